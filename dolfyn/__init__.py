@@ -1,3 +1,36 @@
 from ._version import __version__
-from .main import *
-from .data.velocity import VelBinner
+import sys as _sys
+
+# The public API is imported lazily (on first access), so that ``import
+# dolfyn`` does not import h5py, scipy, pyDictH5, etc. This maps
+# attribute names to the module they are defined in.
+_lazy_attrs = {'read': '.main',
+               'load': '.main',
+               'load_cache': '.main',
+               'read_example': '.main',
+               'VelBinner': '.data.velocity', }
+_lazy_modules = ['adp', 'adv', 'batch', 'data', 'io', 'tools']
+__all__ = list(_lazy_attrs)
+
+if _sys.version_info >= (3, 7):
+
+    def __getattr__(name):
+        import importlib
+        if name in _lazy_attrs:
+            val = getattr(importlib.import_module(_lazy_attrs[name], __name__),
+                          name)
+        elif name in _lazy_modules:
+            val = importlib.import_module('.' + name, __name__)
+        else:
+            raise AttributeError("module '{}' has no attribute '{}'"
+                                 .format(__name__, name))
+        globals()[name] = val
+        return val
+
+    def __dir__():
+        return sorted(set(globals()) | set(_lazy_attrs) | set(_lazy_modules))
+
+else:
+    # Module-level __getattr__ (PEP 562) is not available.
+    from .main import read, load, load_cache, read_example
+    from .data.velocity import VelBinner
@@ -1,5 +1,4 @@
 import numpy as np
-from scipy.signal import medfilt
 from ..tools import misc as tbx
 
 
@@ -114,6 +113,7 @@ def medfilt_orientation(adcpo, kernel_size=7):
     scipy.signal.medfilt
 
     """
+    from scipy.signal import medfilt
 
     do_these = ['pitch_deg', 'roll_deg', 'heading_deg']
     for nm in do_these:
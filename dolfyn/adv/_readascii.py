@@ -1,10 +1,11 @@
+from __future__ import division
 from . import base as adv
 import os
-from ..tools import misc as tbx
+import itertools
 from ..data import time
+from ..data.base import TimeData
 import string
 import numpy as np
-from six import string_types
 
 
 alphs = set(string.ascii_letters).union(['(', ')', '%'])
@@ -180,41 +181,44 @@ class header_reader(object):
 
 
 def read_sen(filename, advd):
-    print("Reading sensor (time, etc.) file %s..." % filename)
-    sr = advd.fs
-    with open(filename, 'r') as fe:
-        nlines = int(count_lines(fe))
-        # prog_bar = dio.progress_bar(nlines, 40)
-        for ind, ln in enumerate(fe):
-            # prog_bar.increment()
-            dt = ln.split()
-            k = ind * sr
-            advd.mpltime[k] = time.date2num(
-                time.datetime(int(dt[2]),
-                              int(dt[0]),
-                              int(dt[1]),
-                              int(dt[3]),
-                              int(dt[4]),
-                              int(dt[5]))
-            )
-            advd.heading[k] = float(dt[10])
-            advd.pitch[k] = float(dt[11])
-            advd.roll[k] = float(dt[12])
-            advd.temp[k] = float(dt[13])
-            if k + sr > advd.shape[-1]:
-                break  # Exit when we get enough data.
-    bd = advd.mpltime == 0
-    advd.mpltime[bd] = np.nan
-    advd.heading[bd] = np.nan
-    advd.pitch[bd] = np.nan
-    advd.roll[bd] = np.nan
-    advd.temp[bd] = np.nan
-    tbx.fillgaps(advd.mpltime)
-    tbx.fillgaps(advd.heading)
-    tbx.fillgaps(advd.pitch)
-    tbx.fillgaps(advd.roll)
-    tbx.fillgaps(advd.temp)
+    """
+    Read the Nortek Vector sensor file *filename*, and interpolate its
+    time, heading, pitch, roll and temperature onto the samples of
+    *advd* (which must have ``props['fs']``).
 
+    Rows with an invalid value are dropped (for all channels), and
+    samples after the last valid row are NaN.
+    """
+    print("Reading sensor (time, etc.) file %s..." % filename)
+    sr = advd.props['fs']
+    n = advd.n_time
+    # The sensor data is recorded every `sr` samples (i.e., at 1 Hz).
+    dt = np.loadtxt(filename, usecols=(0, 1, 2, 3, 4, 5, 10, 11, 12, 13),
+                    ndmin=2, max_rows=int(np.ceil(n / sr)))
+    k = (np.arange(len(dt)) * sr).astype(int)
+    # Stack the sensor channels, so that they are interpolated at once.
+    vals = np.vstack((time.ymdhms2num(dt[:, 2], dt[:, 0], dt[:, 1],
+                                      dt[:, 3], dt[:, 4], dt[:, 5]),
+                      dt[:, 6:].T))
+    gd = ~np.isnan(vals).any(0)
+    k, vals = k[gd], vals[:, gd]
+    # Linearly interpolate onto the samples between the first and
+    # last sensor sample (the others are NaN).
+    out = np.empty((len(vals), n))
+    out[:] = np.NaN
+    if len(k) > 0:
+        i = np.arange(k[0], min(k[-1] + 1, n))
+        i0 = np.minimum(np.searchsorted(k, i, side='right') - 1,
+                        max(len(k) - 2, 0))
+        i1 = np.minimum(i0 + 1, len(k) - 1)
+        w = (i - k[i0]) / np.maximum(k[i1] - k[i0], 1)
+        out[:, i] = vals[:, i0] * (1 - w) + vals[:, i1] * w
+    advd['mpltime'] = time.time_array(out[0])
+    for grp in ['orient', 'env']:
+        if grp not in advd:
+            advd[grp] = TimeData()
+    (advd['orient']['heading'], advd['orient']['pitch'],
+     advd['orient']['roll'], advd['env']['temp']) = out[1:]
     return advd
 
 
@@ -258,6 +262,68 @@ def read_sontek_winadv(filename,
     return dat
 
 
+# The (ISO 8601) strptime formats that numpy's datetime64 parser can
+# read.
+_iso_formats = set(['%Y-%m-%d', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M:%S',
+                    '%Y-%m-%dT%H:%M:%S.%f', '%Y-%m-%d %H:%M:%S.%f'])
+
+
+def _parse_times(vals, frmt):
+    """
+    Convert the array of time strings `vals` to mpltime. ISO 8601
+    formats are parsed by numpy, all at once. Otherwise, each unique
+    string is only parsed once (ADV time stamps usually repeat for
+    many samples). Values that can not be parsed are NaN.
+    """
+    if _iso_formats.issuperset(frmt.split(';')):
+        try:
+            out = time.M82num(np.char.replace(vals, ' ', 'T')
+                              .astype('M8[us]'))
+        except ValueError:
+            # Fall back to parsing each unique value.
+            pass
+        else:
+            return out, np.isnan(out).sum()
+    uvals, inv = np.unique(vals, return_inverse=True)
+    out = np.empty(len(uvals), dtype=np.float64)
+    for idx, val in enumerate(uvals):
+        try:
+            out[idx] = time_func(val, frmt)
+        except ValueError:
+            try:
+                # See if it is only a date, presuming the format
+                # starts with date.
+                out[idx] = time_func(val, frmt[:9])
+            except ValueError:
+                out[idx] = np.NaN
+    return out[inv], np.isnan(out)[inv].sum()
+
+
+def _read_blocks(fu, dlm, cols, nlines=None, blocksize=2 ** 16):
+    """
+    Read the columns `cols` ({column index: dtype}) of the delimited
+    text file `fu` in blocks of `blocksize` lines, and return them as
+    a dict of arrays. The arrays grow geometrically, so that the file
+    is read in a single pass.
+    """
+    inds = sorted(cols)
+    dtype = [('c{}'.format(ind), cols[ind]) for ind in inds]
+    out = np.empty(blocksize, dtype=dtype)
+    n = 0
+    while nlines is None or n < nlines:
+        nread = blocksize if nlines is None else min(blocksize, nlines - n)
+        lines = list(itertools.islice(fu, nread))
+        if len(lines) == 0:
+            break
+        blk = np.loadtxt(lines, dtype=dtype, ndmin=1, usecols=inds,
+                         delimiter=None if dlm == ' ' else dlm)
+        if n + len(blk) > len(out):
+            out = np.resize(out, max(2 * len(out), n + len(blk)))
+        out[n:n + len(blk)] = blk
+        n += len(blk)
+    return dict((ind, out['c{}'.format(ind)][:n]) for ind in inds)
+
+
 def read_dat(filename,
              dat_map=['burst', 'ensemble',
                       'u', 'v', 'w',
@@ -274,63 +340,43 @@ def read_dat(filename,
     containing the data.
 
     *dat_map* specifies the variable names of the columns of the file.
+    The 'u', 'v' and 'w' columns are stored in 'vel', and
+    '_time:<strptime format>' columns are converted to 'mpltime'.
 
     """
     print("Reading adv ascii data file: %s..." % filename)
+    cols = {}
+    for ind, nm in enumerate(dat_map):
+        if nm is None:
+            continue
+        if nm.startswith('_time:'):
+            cols[ind] = 'U64'
+        elif not nm.startswith('_'):
+            cols[ind] = np.float64
     with open(filename, 'r') as fu:
-        k = 0
-        if nlines is None:
-            nlines = int(count_lines(fu))
-        # prog_bar = dio.progress_bar(nlines, 40)
-        advd = cls(nlines, dat_map)
-        advd.add_data('mpltime', np.empty(
-            nlines, dtype=np.float64), '_essential')
-        bd_time = 0
-        for i, ln in enumerate(fu):
-            if i < skip_n_headlines:
-                continue
-            idx = i - skip_n_headlines
-            if idx >= nlines:
-                break
-            # prog_bar.increment()
-            if dlm == ' ':
-                dt = ln.split()
-            else:
-                dt = ln.split(dlm)
-            if len(dt) == 0:  # EOF?
-                break
-            for ind, nm in enumerate(dat_map):
-                if nm is None:
-                    continue
-                # if not hasattr(advd,nm):
-
-                if isinstance(nm, string_types) and not nm.startswith('_'):
-                    advd.__getattribute__(nm)[idx] = float(dt[ind])
-                # is 'nm' a function?
-                elif nm.__class__ is time_func.__class__:
-                    args = [dt[ind]]
-                    itmp = 1
-                    while dat_map[ind + itmp].startswith('_'):
-                        args.append(dt[ind + itmp])
-                        itmp += 1
-                    advd.__getattribute__(nm)[idx] = nm(*args)
-                elif nm.startswith('_time:'):
-                    try:
-                        advd.mpltime[idx] = time_func(dt[ind], nm[6:])
-                    except ValueError:
-                        # See if it is only a date, presuming the
-                        # format starts with date.
-                        advd.mpltime[idx] = time_func(dt[ind], nm[6:15])
-                    except ValueError:
-                        bd_time += 1
-                        break
-            k += 1
-    # What does this do?
-    if k < len(advd.mpltime):
-        for nm, dat in advd.iter():
-            if nm.startswith('_time'):
-                nm = 'mpltime'
-            setattr(advd, nm, dat[..., :k])
+        for i in range(skip_n_headlines):
+            fu.readline()
+        dat = _read_blocks(fu, dlm, cols, nlines=nlines)
+    k = len(dat[min(cols)]) if cols else 0
+    advd = cls()
+    mpltime = np.empty(k, dtype=np.float64)
+    vel = np.empty((3, k), dtype=np.float64)
+    vel[:] = np.NaN
+    bd_time = 0
+    for ind, nm in enumerate(dat_map):
+        if ind not in cols:
+            continue
+        if nm.startswith('_time:'):
+            mpltime[:], bd_time = _parse_times(dat[ind], nm[6:])
+        elif nm == 'mpltime':
+            mpltime[:] = dat[ind]
+        elif nm in ['u', 'v', 'w']:
+            vel['uvw'.index(nm)] = dat[ind]
+        else:
+            advd[nm] = dat[ind]
+    if set(['u', 'v', 'w']).intersection(dat_map):
+        advd['vel'] = vel
+    advd['mpltime'] = time.time_array(mpltime)
     print('%d out of %d lines had bad time stamps' % (bd_time, k))
     return advd
 
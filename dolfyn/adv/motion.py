@@ -1,7 +1,5 @@
 from __future__ import division
 import numpy as np
-import scipy.signal as sig
-from scipy.integrate import cumtrapz
 from . import rotate as rot
 import warnings
 
@@ -106,6 +104,7 @@ class CalcMotion(object):
     def _set_AccelStable(self, ):
         """
         """
+        import scipy.signal as sig
         self.AccelStable = acc = self.Accel.copy()
         if self.accel_filtfreq == 0:
             acc[:] = acc.mean(-1)[..., None]
@@ -145,6 +144,8 @@ class CalcMotion(object):
         velacc : |np.ndarray| (3 x n_time)
                The acceleration-induced velocity array (3, n_time).
         """
+        import scipy.signal as sig
+        from scipy.integrate import cumtrapz
         samp_freq = self.advo['props']['fs']
 
         hp = self.Accel - self.AccelStable
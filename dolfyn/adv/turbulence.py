@@ -4,7 +4,6 @@ from ..data.velocity import VelBinner
 from .base import ADVbinned
 from ..data import base as db
 from ..tools.misc import slice1d_along_axis, nans_like
-from scipy.special import cbrt
 
 
 kappa = 0.41
@@ -97,8 +96,10 @@ class TurbBinner(VelBinner):
         self._check_indata(advr)
         self.do_avg(advr, out)
         noise = advr.get('doppler_noise', [0, 0, 0])
-        out['tke_vec'] = self.calc_tke(advr['vel'], noise=noise)
-        out['stress'] = self.calc_stress(advr['vel'])
+        # Detrend the velocity once, for both tke and stress.
+        vel = self.detrend(advr['vel'][:3])
+        out['tke_vec'] = self.calc_tke(vel, noise=noise, detrend=False)
+        out['stress'] = self.calc_stress(vel, detrend=False)
         out['sigma_Uh'] = (np.std(self.reshape(advr.U_mag),
                                   -1,
                                   dtype=np.float64) -
@@ -110,6 +111,9 @@ class TurbBinner(VelBinner):
                                                window=window)
         out['Spec']['omega'] = self.calc_omega()
         out.props['n_bin'] = self.n_bin
+        if self._parse_nstep() != self.n_bin:
+            # Only overlapping (or gapped) bins record n_step.
+            out.props['n_step'] = self._parse_nstep()
         out.props['n_fft'] = self.n_fft
         out.props['n_fft_coh'] = self.n_fft_coh
 
@@ -304,6 +308,7 @@ class TurbBinner(VelBinner):
           velocity fluctuations.
 
         """
+        from scipy.special import cbrt
         x = np.arange(-20, 20, 1e-2)  # I think this is a long enough range.
         out = np.empty_like(Itke.flatten())
         for i, (b, t) in enumerate(zip(Itke.flatten(), theta.flatten())):
@@ -0,0 +1,310 @@
+"""
+Convert many raw instrument files at once.
+
+This module reads raw data files (anything that :func:`dolfyn.read`
+can read) in parallel, optionally cleans, rotates and motion-corrects
+them, and writes them to HDF5, MATLAB or dolfyn-cache files.
+
+It is also a command line tool (see ``scripts/dolfyn_batch.py``)::
+
+    $ python -m dolfyn.batch -f h5 -f mat --rotate earth -j 8 data/
+
+"""
+from __future__ import division, print_function
+import os
+import sys
+import glob
+import time
+import shutil
+import argparse
+import traceback
+import six
+
+# The file extensions of each output format.
+formats = {'h5': '.h5',
+           'mat': '.mat',
+           'cache': '.cache', }
+
+
+def find_files(inputs):
+    """
+    Return the list of raw data files in `inputs`.
+
+    Parameters
+    ----------
+    inputs : list of strings
+      Filenames, glob patterns, or directories. Directories are
+      searched (not recursively) for files that dolfyn can read
+      (identified from their first bytes).
+    """
+    from .io.api import sniff_reader
+    out = []
+    for inp in inputs:
+        if os.path.isdir(inp):
+            for fnm in sorted(os.listdir(inp)):
+                fnm = os.path.join(inp, fnm)
+                if os.path.isfile(fnm) and sniff_reader(fnm) is not None:
+                    out.append(fnm)
+        else:
+            out.extend(sorted(glob.glob(inp)) or [inp])
+    # Remove duplicates (but keep the order).
+    seen = set()
+    return [fnm for fnm in out if not (fnm in seen or seen.add(fnm))]
+
+
+def output_names(fname, outdir=None, fmts=['h5']):
+    """Return the output filenames for the raw data file `fname`.
+    """
+    base = os.path.splitext(fname)[0]
+    if outdir is not None:
+        base = os.path.join(outdir, os.path.basename(base))
+    return [base + formats[fmt] for fmt in fmts]
+
+
+def _is_uptodate(fname, outnames):
+    mtime = os.path.getmtime(fname)
+    return all(os.path.exists(onm) and os.path.getmtime(onm) >= mtime
+               for onm in outnames)
+
+
+def process(dat, clean=False, rotate=None, motion=False):
+    """
+    Perform the (optional) processing steps on a data object.
+
+    Parameters
+    ----------
+    dat : ADV or ADP data object
+    clean : bool
+      Despike ADV velocities with the Goring and Nikora (2002)
+      method.
+    rotate : {None, 'inst', 'earth', 'principal'}
+      The coordinate system to rotate the data into. ADV data can
+      not be rotated out of beam coordinates (this raises a
+      ValueError).
+    motion : bool
+      Perform motion correction (ADVs with an IMU only). This
+      rotates the data to the earth frame.
+    """
+    inst_type = dat.props.get('inst_type', None)
+    frames = ['beam', 'inst', 'earth', 'principal']
+
+    def needs(frame):
+        # Whether the data must be rotated *into* `frame`.
+        return (rotate is not None and
+                frames.index(dat.props['coord_sys']) < frames.index(frame)
+                <= frames.index(rotate))
+
+    if inst_type == 'ADV':
+        from .adv import api as avm
+        if clean:
+            for comp in [dat.u, dat.v, dat.w]:
+                avm.clean.GN2002(comp)
+        if needs('inst'):
+            # This would need the head->body rotation as well.
+            raise ValueError("Rotating ADV data out of beam coordinates "
+                             "is not supported.")
+        if motion and dat.props.get('has imu', False):
+            avm.motion.correct_motion(dat)
+        if needs('earth'):
+            avm.rotate.inst2earth(dat)
+        if needs('principal'):
+            avm.rotate.earth2principal(dat)
+    elif inst_type == 'ADP':
+        from .adp import api as apm
+        if needs('inst'):
+            apm.beam2inst(dat)
+        if needs('earth'):
+            apm.inst2earth(dat)
+        if needs('principal'):
+            apm.earth2principal(dat)
+    return dat
+
+
+def _remove(path):
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def _write(dat, outnames, fmts):
+    for fmt, onm in zip(fmts, outnames):
+        # Write to a temporary file, so that a crash never leaves a
+        # partial (but up-to-date looking) output file.
+        tmp = onm + '.tmp-{}'.format(os.getpid())
+        try:
+            if fmt == 'h5':
+                dat.to_hdf5(tmp)
+            elif fmt == 'mat':
+                dat.save_mat(tmp)
+            elif fmt == 'cache':
+                dat.save_cache(tmp)
+            if fmt == 'cache':
+                _remove(onm)
+            os.rename(tmp, onm)
+        except Exception:
+            _remove(tmp)
+            raise
+
+
+def convert_file(fname, outdir=None, fmts=['h5'], force=False, **kwargs):
+    """
+    Read, process (see :func:`process`) and write one file.
+
+    Returns
+    -------
+    result : dict
+      'fname', 'status' ('done', 'skipped' or 'failed'), 'nbytes',
+      'time' and (for failed files) 'error'.
+    """
+    from .io.api import read
+    t0 = time.time()
+    out = dict(fname=fname, status='skipped', nbytes=0, error=None)
+    try:
+        outnames = output_names(fname, outdir, fmts)
+        if force or not _is_uptodate(fname, outnames):
+            dat = read(fname)
+            process(dat, **kwargs)
+            _write(dat, outnames, fmts)
+            out['status'] = 'done'
+            out['nbytes'] = os.path.getsize(fname)
+    except Exception:
+        out['status'] = 'failed'
+        out['error'] = traceback.format_exc()
+    out['time'] = time.time() - t0
+    return out
+
+
+def _convert_file(args):
+    return convert_file(args[0], **args[1])
+
+
+def convert(inputs, outdir=None, fmts=['h5'], workers=None, force=False,
+            clean=False, rotate=None, motion=False, verbose=True):
+    """
+    Convert raw data files in parallel.
+
+    Parameters
+    ----------
+    inputs : string or list of strings
+      Filenames, glob patterns, or directories (see
+      :func:`find_files`).
+    outdir : string
+      The directory to write to (default: next to each raw file).
+    fmts : list of {'h5', 'mat', 'cache'}
+      The output formats.
+    workers : int
+      The number of processes (default: the number of CPUs). If this
+      is 1, the files are converted in this process.
+    force : bool
+      Convert files even if their outputs are newer than the raw
+      file.
+    clean, rotate, motion :
+      The processing options (see :func:`process`).
+    verbose : bool
+      Print the progress and a summary.
+
+    Returns
+    -------
+    results : list of dicts
+      The results for each file (see :func:`convert_file`). A failure
+      in one file does not stop the others from being converted.
+    """
+    if isinstance(inputs, six.string_types):
+        inputs = [inputs]
+    for fmt in fmts:
+        if fmt not in formats:
+            raise ValueError("Invalid output format '{}'.".format(fmt))
+    fnames = find_files(inputs)
+    if outdir is not None and not os.path.isdir(outdir):
+        os.makedirs(outdir)
+    kwargs = dict(outdir=outdir, fmts=fmts, force=force,
+                  clean=clean, rotate=rotate, motion=motion)
+    jobs = [(fnm, kwargs) for fnm in fnames]
+    t0 = time.time()
+    results = []
+    if workers == 1 or len(jobs) < 2:
+        results_iter = map(_convert_file, jobs)
+        pool = None
+    else:
+        import multiprocessing as mp
+        pool = mp.Pool(workers)
+        results_iter = pool.imap_unordered(_convert_file, jobs)
+    try:
+        for res in results_iter:
+            results.append(res)
+            if verbose:
+                print('{: <8} {} ({:.1f} s)'.format(res['status'],
+                                                     res['fname'],
+                                                     res['time']))
+                if res['error'] is not None:
+                    print(res['error'])
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    if verbose:
+        print(summary(results, time.time() - t0))
+    return results
+
+
+def summary(results, elapsed):
+    """Return a summary of the results of :func:`convert`.
+    """
+    ndone = sum(res['status'] == 'done' for res in results)
+    nbytes = sum(res['nbytes'] for res in results)
+    elapsed = max(elapsed, 1e-9)
+    out = ('{} files: {} converted, {} skipped, {} failed.\n'
+           '{:.1f} MB in {:.1f} s ({:.2f} MB/s, {:.2f} files/s)'
+           .format(len(results), ndone,
+                   sum(res['status'] == 'skipped' for res in results),
+                   sum(res['status'] == 'failed' for res in results),
+                   nbytes / 1e6, elapsed, nbytes / 1e6 / elapsed,
+                   ndone / elapsed))
+    failed = [res['fname'] for res in results if res['status'] == 'failed']
+    if failed:
+        out += '\nFailed files:\n  ' + '\n  '.join(failed)
+    return out
+
+
+def main(argv=None):
+    """The command line interface.
+    """
+    parser = argparse.ArgumentParser(
+        description="Convert raw ADV/ADP data files (e.g., .VEC, .ad2cp, "
+        ".000) to HDF5, Matlab(TM) or dolfyn-cache files, in parallel.")
+    parser.add_argument(
+        'inputs', nargs='+',
+        help="The files, glob patterns or directories to convert.")
+    parser.add_argument(
+        '-o', '--outdir', default=None,
+        help="The output directory (default: next to the input files).")
+    parser.add_argument(
+        '-f', '--format', action='append', dest='fmts',
+        choices=sorted(formats),
+        help="The output format (default: h5). This can be repeated.")
+    parser.add_argument(
+        '-j', '--workers', type=int, default=None,
+        help="The number of processes (default: the number of CPUs).")
+    parser.add_argument(
+        '--force', action='store_true',
+        help="Convert files even if their outputs are up to date.")
+    parser.add_argument(
+        '--clean', action='store_true',
+        help="Despike ADV velocities (Goring and Nikora, 2002).")
+    parser.add_argument(
+        '--rotate', choices=['inst', 'earth', 'principal'], default=None,
+        help="Rotate the data into this coordinate system.")
+    parser.add_argument(
+        '--motion', action='store_true',
+        help="Motion-correct IMU-ADV data.")
+    args = parser.parse_args(argv)
+    results = convert(args.inputs, outdir=args.outdir,
+                      fmts=args.fmts or ['h5'], workers=args.workers,
+                      force=args.force, clean=args.clean,
+                      rotate=args.rotate, motion=args.motion)
+    return int(any(res['status'] == 'failed' for res in results))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,4 +1,3 @@
-from ..io import main as io
 import numpy as np
 from ..data.velocity import Velocity
 from ..tools.misc import degN2cartDeg
@@ -25,14 +24,16 @@ class buoy_raw(Velocity):
         return self.U.imag
 
 
-type_map = io.get_typemap(__name__)
-
-
 def load(fname, data_groups=None):
-    with io.loader(fname, type_map) as ldr:
-        return ldr.load(data_groups)
+    """Load buoy data from the hdf5 file `fname`.
+    """
+    from ..io.hdf5 import load
+    return load(fname, data_groups=data_groups)
 
 
 def mmload(fname, data_groups=None):
-    with io.loader(fname, type_map) as ldr:
-        return ldr.mmload(data_groups)
+    """Load buoy data from the hdf5 file `fname`, reading each array
+    when it is first used.
+    """
+    from ..io.hdf5 import load
+    return load(fname, data_groups=data_groups, lazy=True)
@@ -2,7 +2,9 @@ from ..meta import api_dumb as ma
 import numpy as np
 from pyDictH5.base import data as SourceDataType
 import six
-import copy
+import datetime
+from copy import deepcopy
+from . import time
 
 rad_hz = ma.marray(2 * np.pi, ma.varMeta('', {'s': -1, 'hz': -1}))
 
@@ -11,6 +13,91 @@ def indent(text, padding='    '):
     return ''.join(padding + line for line in text.splitlines(True))
 
 
+class LazyArray(object):
+    """
+    A proxy for an array that is stored on disk (e.g., an h5py
+    dataset). The data is only read when it is accessed.
+
+    Parameters
+    ----------
+    source : array-like
+      The stored data (anything that supports numpy-style
+      indexing and has `shape` and `dtype` attributes).
+    indx : tuple of slices
+      The subset of `source` that this proxy represents (default: all
+      of it).
+    view : type
+      The ndarray subclass of the array.
+    cache : bool
+      Whether the data object that contains this proxy should
+      replace it with the array once it has been read.
+
+    Notes
+    -----
+    Indexing a proxy (``proxy[...]``) only reads the requested part of
+    the data. Data objects (:class:`data`) return the full array when
+    the item is accessed (e.g., ``dat.vel`` or ``dat['vel']``).
+    """
+
+    def __init__(self, source, indx=None, view=None, cache=True):
+        self.source = source
+        self.indx = indx
+        self.view = view
+        self.cache = cache
+        if indx is None:
+            self.shape = tuple(source.shape)
+        else:
+            self.shape = tuple(len(range(*idx.indices(n)))
+                               for idx, n in zip(indx, source.shape))
+
+    @property
+    def dtype(self, ):
+        return self.source.dtype
+
+    @property
+    def ndim(self, ):
+        return len(self.shape)
+
+    @property
+    def size(self, ):
+        return int(np.prod(self.shape))
+
+    def __len__(self, ):
+        return self.shape[0]
+
+    def _post(self, arr):
+        arr = np.asarray(arr)
+        if self.view is not None and self.view is not np.ndarray:
+            arr = arr.view(self.view)
+        return arr
+
+    def load(self, ):
+        """Read the data into memory, and return it.
+        """
+        if self.indx is None:
+            return self._post(self.source[()])
+        return self._post(self.source[self.indx])
+
+    def __getitem__(self, indx):
+        if self.indx is None:
+            try:
+                return self._post(self.source[indx])
+            except (TypeError, ValueError):
+                pass
+        return self.load()[indx]
+
+    def __array__(self, dtype=None, copy=None):
+        if dtype is None:
+            return self.load()
+        return self.load().astype(dtype)
+
+    def __deepcopy__(self, memo):
+        return self.load()
+
+    def __repr__(self, ):
+        return '<LazyArray; {}; {}>'.format(self.shape, self.dtype)
+
+
 def _format_repr(dat, level=0, show_all=False, skip=[]):
     s_ky = ''
     s_grp = ''
@@ -19,16 +106,19 @@ def _format_repr(dat, level=0, show_all=False, skip=[]):
             continue
         if ky in skip:
             continue
-        if isinstance(dat[ky], dict):
+        val = dict.__getitem__(dat, ky)
+        if isinstance(val, dict):
             if level > 0:
                 s_grp += ' > + {: <23}: {}\n'.format(ky, '+ DATA GROUP')
-                s_grp += indent(_format_repr(dat[ky], level - 1), '  ')
+                s_grp += indent(_format_repr(val, level - 1), '  ')
             else:
                 s_grp += ' + {: <25}: {}\n'.format(ky, '+ DATA GROUP')
         else:
-            val = dat[ky]
             sval = str(type(val))
-            if type(val) is np.ndarray:
+            if isinstance(val, LazyArray):
+                sval = '<lazy array; {}; {}>'.format(val.shape,
+                                                     val.dtype)
+            elif type(val) is np.ndarray:
                 sval = '<array; {}; {}>'.format(val.shape,
                                                 val.dtype)
             elif isinstance(val, np.ndarray):
@@ -73,6 +163,25 @@ def _format_repr_config(dat, level=0, show_all=False, skip=[]):
     return s
 
 
+def _is_basic_index(indx):
+    """Test whether `indx` is a 'basic' numpy index (i.e., indexing
+    with it returns a view rather than a copy).
+    """
+    if isinstance(indx, tuple):
+        return all(_is_basic_index(idx) for idx in indx)
+    return (indx is Ellipsis or indx is None or
+            isinstance(indx, (slice, np.integer) + six.integer_types) and
+            not isinstance(indx, bool))
+
+
+def _is_slice(indx):
+    """Test whether `indx` is a slice, or a tuple of slices.
+    """
+    if isinstance(indx, tuple):
+        return len(indx) > 0 and all(isinstance(idx, slice) for idx in indx)
+    return isinstance(indx, slice)
+
+
 class data(SourceDataType):
     """
     This is just an abstract class so that we directly import the
@@ -90,6 +199,90 @@ class data(SourceDataType):
                 '  *------------\n' +
                 indent(_format_repr(self), ' '))
 
+    def __getitem__(self, indx):
+        if _is_slice(indx):
+            # e.g., dat[1000:2000]
+            return self._subset(indx)
+        if not isinstance(indx, six.string_types):
+            raise KeyError(indx)
+        if (isinstance(indx, six.string_types) and '.' in indx and
+                not dict.__contains__(self, indx)):
+            grp, indx = indx.rsplit('.', 1)
+            return self[grp][indx]
+        val = SourceDataType.__getitem__(self, indx)
+        if isinstance(val, LazyArray):
+            # Read lazy (on-disk) arrays on first access.
+            lazy = val
+            val = lazy.load()
+            if lazy.cache:
+                dict.__setitem__(self, indx, val)
+        return val
+
+    def __contains__(self, key):
+        if dict.__contains__(self, key):
+            return True
+        if not isinstance(key, six.string_types) or '.' not in key:
+            return False
+        tmp = self
+        for ky in key.split('.'):
+            if not isinstance(tmp, dict) or not dict.__contains__(tmp, ky):
+                return False
+            tmp = dict.__getitem__(tmp, ky)
+        return True
+
+    def _get_stored(self, key):
+        """Return the item `key` *without* reading lazy arrays.
+        """
+        tmp = self
+        for ky in key.split('.'):
+            tmp = dict.__getitem__(tmp, ky)
+        return tmp
+
+    def to_hdf5(self, buf, chunks=True, compression='gzip', **kwargs):
+        """
+        Write the data in this object to an hdf5 file.
+
+        Parameters
+        ----------
+        buf : string or h5py.Group
+          The filename (or open h5py file/group) to write to.
+        chunks : bool or int
+          If this is an int, datasets are chunked along the time
+          dimension with this length (see
+          :func:`dolfyn.io.hdf5.save`). Otherwise, it is passed to
+          h5py.
+        compression : {'gzip', 'lzf', None}
+          The compression filter.
+        **kwargs
+          Additional options for :func:`dolfyn.io.hdf5.save`
+          (`compression_opts`, and `shuffle`, which is True by
+          default).
+        """
+        if isinstance(chunks, bool) and not kwargs:
+            return SourceDataType.to_hdf5(self, buf, chunks=chunks,
+                                          compression=compression)
+        from ..io.hdf5 import save
+        save(buf, self, chunks=chunks, compression=compression, **kwargs)
+
+    def save_cache(self, path):
+        """
+        Write the data in this object to a (memory-mappable) dolfyn
+        cache directory.
+
+        See :func:`dolfyn.io.cache.save_cache`.
+        """
+        from ..io.cache import save_cache
+        save_cache(self, path)
+
+    def save_mat(self, fname, groups=None, **kwargs):
+        """
+        Write the data in this object to a Matlab(TM) (v7.3) file.
+
+        See :func:`dolfyn.io.mat.save_mat` for the options.
+        """
+        from ..io.mat import save_mat
+        save_mat(fname, self, groups=groups, **kwargs)
+
 
 class TimeData(data):
     """
@@ -98,11 +291,105 @@ class TimeData(data):
     """
     _time_dim = -1
 
-    def _subset(self, indx):
-        if not isinstance(indx, tuple):
-            indx = (Ellipsis, indx)
-        return SourceDataType._subset(self, indx,
-                                      raise_on_empty_array=True)
+    def _subset(self, indx, raise_on_empty_array=True, copy=[],
+                n_time=None):
+        """
+        Return a subset of this data object.
+
+        Parameters
+        ----------
+        indx : slice, int, or index array
+          The time index of the subset. This is applied to the time
+          dimension of each array (and recursively to data
+          groups), so that groups with time on different axes (e.g.,
+          :class:`FreqData`) are indexed correctly. If `indx` is a
+          tuple, it is applied to every array as-is.
+        raise_on_empty_array : bool
+          Raise an IndexError if the subset of an array is empty.
+        copy : list of strings
+          The items to copy (rather than subset).
+        n_time : int
+          The length of the time dimension. Arrays whose time
+          dimension has a different length (e.g., `range`) are not
+          subset. By default, this is the length of `mpltime` (if it
+          exists).
+
+        Notes
+        -----
+        For slices (and integers), the arrays of the subset are views
+        into the arrays of this object (see numpy's basic indexing),
+        and the items in `copy` and the config are shared with this
+        object. Use ``.copy()`` to get an independent data object.
+        """
+        out = self.__class__()
+        if n_time is None and 'mpltime' in self:
+            n_time = self._get_stored('mpltime').shape[-1]
+        if isinstance(indx, tuple):
+            slc = indx
+            n_time = None
+        else:
+            slc = (Ellipsis, indx) + (slice(None), ) * (-self._time_dim - 1)
+        for nm in self:
+            val = self[nm]
+            if nm in copy:
+                if not _is_basic_index(indx):
+                    val = deepcopy(val)
+            elif isinstance(val, TimeData):
+                val = val._subset(indx,
+                                  raise_on_empty_array=raise_on_empty_array,
+                                  copy=copy, n_time=n_time)
+            elif isinstance(val, SourceDataType):
+                val = val._subset(indx,
+                                  raise_on_empty_array=raise_on_empty_array,
+                                  copy=copy)
+            elif (isinstance(val, np.ndarray) and
+                  val.ndim >= len(slc) - 1 and
+                  (n_time is None or
+                   val.shape[1 - len(slc)] == n_time)):
+                val = val[slc]
+                if raise_on_empty_array and 0 in val.shape:
+                    raise IndexError("The indexing object yields "
+                                     "empty arrays for field '{}'.".format(nm))
+            dict.__setitem__(out, nm, val)
+        return out
+
+    def sel_time(self, t0=None, t1=None):
+        """
+        Select the data for which ``t0 <= mpltime < t1``.
+
+        Parameters
+        ----------
+        t0, t1 : float (mpltime), datetime, or ISO-format string
+          The start and end of the time range. None means no limit.
+
+        Returns
+        -------
+        out : data object (of the same type)
+          The subset of the data. The arrays are views into this
+          object's arrays (they share memory).
+
+        Notes
+        -----
+        `mpltime` must be monotonic. The time index is found with
+        a binary search (`np.searchsorted`).
+        """
+        t = self['mpltime']
+        i0, i1 = 0, t.shape[-1]
+        if t0 is not None:
+            i0 = np.searchsorted(t, _to_mpltime(t0), side='left')
+        if t1 is not None:
+            i1 = np.searchsorted(t, _to_mpltime(t1), side='left')
+        return self._subset(slice(i0, max(i0, i1)))
+
+
+def _to_mpltime(val):
+    if isinstance(val, six.string_types):
+        return time.isotime2mpltime(val)
+    if isinstance(val, datetime.datetime):
+        return time.date2num(val)
+    if isinstance(val, np.datetime64):
+        return time.M82num(val)
+    return val
 
 
 class FreqData(TimeData):
@@ -112,12 +399,11 @@ class FreqData(TimeData):
     """
     _time_dim = -2
 
-    def _subset(self, indx):
-        if not isinstance(indx, tuple):
-            indx = (Ellipsis, indx, slice(None))
-        return SourceDataType._subset(self, indx,
-                                      raise_on_empty_array=True,
-                                      copy=['omega', 'freq'])
+    def _subset(self, indx, raise_on_empty_array=True,
+                copy=['omega', 'freq'], n_time=None):
+        return TimeData._subset(self, indx,
+                                raise_on_empty_array=raise_on_empty_array,
+                                copy=copy, n_time=n_time)
 
 
 class config(data):
@@ -133,6 +419,6 @@ class config(data):
                 '  *------------\n' +
                 indent(_format_repr_config(self, level=2), ' '))
 
-    def _subset(self, indx):
-        # Don't subset config objects.
-        return copy.deepcopy(self)
+    def _subset(self, indx, **kwargs):
+        # Don't subset config objects (subsets share the config).
+        return self
@@ -1,7 +1,7 @@
 from __future__ import division
 import numpy as np
 from ..tools.psd import psd_freq, cohere, psd, cpsd_quasisync, \
-    cpsd, phase_angle
+    cpsd, phase_angle, SpecProducts
 from ..tools.misc import slice1d_along_axis, detrend
 from .base import ma, TimeData
 import copy
@@ -38,16 +38,18 @@ class TimeBinner(object):
         """
         Returns `outshape` (the 'reshape'd shape) for an `inshape` array.
         """
-        n_bin = int(self._parse_nbin(n_bin))
-        return list(inshape[:-1]) + [inshape[-1] // n_bin, n_bin + n_pad]
+        n_bin = self._parse_nbin(n_bin)
+        n_step = self._parse_nstep(n_bin=n_bin)
+        # The number of (possibly overlapping) windows:
+        n_win = max(int((inshape[-1] - n_bin) // n_step) + 1, 0)
+        return list(inshape[:-1]) + [n_win, int(n_bin) + n_pad]
 
     def _outshape_fft(self, inshape, n_fft=None, n_bin=None):
         """
         Returns `outshape` (the fft 'reshape'd shape) for an `inshape` array.
         """
         n_fft = self._parse_nfft(n_fft)
-        n_bin = self._parse_nbin(n_bin)
-        return list(inshape[:-1]) + [inshape[-1] // n_bin, n_fft // 2]
+        return self._outshape(inshape, n_bin=n_bin)[:-1] + [n_fft // 2]
 
     def _parse_fs(self, fs=None):
         if fs is not None:
@@ -59,6 +61,14 @@ class TimeBinner(object):
             return self.n_bin
         return n_bin
 
+    def _parse_nstep(self, n_step=None, n_bin=None):
+        if n_step is not None:
+            return n_step
+        if self.n_step is None:
+            # Back-to-back bins.
+            return self._parse_nbin(n_bin)
+        return self.n_step
+
     def _parse_nfft(self, n_fft=None):
         if n_fft is None:
             return self.n_fft
@@ -68,6 +78,9 @@ class TimeBinner(object):
         """
         Reshape the array `arr` to shape (...,n,n_bin+n_pad).
 
+        The `n` windows start every `n_step` points (see
+        :meth:`__init__`), so they overlap if `n_step` < `n_bin`.
+
         Parameters
         ----------
         arr : np.ndarray
@@ -91,28 +104,47 @@ class TimeBinner(object):
         - for n_bin=2048.2 every 1/5 bins will have a skipped point.
         - for n_bin=4096.9 every 9/10 bins will have a skipped point.
 
+        The output is a read-only array that shares memory with `arr`
+        when possible (i.e., it is not copied). Use ``.copy()`` if you
+        need to modify it.
         """
         n_bin = self._parse_nbin(n_bin)
+        n_step = self._parse_nstep(n_bin=n_bin)
+        n_pad = int(n_pad)
         npd0 = n_pad // 2
-        npd1 = (n_pad + 1) // 2
         shp = self._outshape(arr.shape, n_pad=0, n_bin=n_bin)
-        out = np.zeros(
-            self._outshape(arr.shape, n_pad=n_pad, n_bin=n_bin),
-            dtype=arr.dtype)
-        if np.mod(n_bin, 1) == 0:
+        dat = np.asarray(arr)
+        if np.mod(n_bin, 1) == 0 and np.mod(n_step, 1) == 0:
             # If n_bin is an integer, we can do this simply.
-            out[..., npd0: n_bin + npd0] = (
-                arr[..., :(shp[-2] * shp[-1])]).reshape(shp, order='C')
-        else:
+            n_bin, n_step = int(n_bin), int(n_step)
+            dat = dat[..., :max((shp[-2] - 1) * n_step + n_bin, 0)]
+        elif n_step == n_bin:
             inds = (np.arange(np.prod(shp[-2:])) * n_bin // int(n_bin)
                     ).astype(int)
-            out[..., npd0:int(n_bin) + npd0] = (arr[..., inds]
-                                                ).reshape(shp, order='C')
+            dat = dat[..., inds]
             # n_bin needs to be int for the n_pad operation.
-            n_bin = int(n_bin)
+            n_bin = n_step = int(n_bin)
+        else:
+            raise ValueError("Non-integer `n_bin` requires "
+                             "`n_step` = `n_bin`.")
         if n_pad != 0:
-            out[..., 1:, :npd0] = out[..., :-1, n_bin:n_bin + npd0]
-            out[..., :-1, -npd1:] = out[..., 1:, npd0:npd0 + npd1]
+            # Zero-pad the beginning and end of the timeseries (one
+            # copy).
+            pad = np.zeros(dat.shape[:-1] + (dat.shape[-1] + n_pad, ),
+                           dtype=dat.dtype)
+            pad[..., npd0:npd0 + dat.shape[-1]] = dat
+            dat = pad
+        # The windows are a strided view of `dat`.
+        out = np.lib.stride_tricks.as_strided(
+            dat,
+            shape=dat.shape[:-1] + (shp[-2], n_bin + n_pad),
+            strides=dat.strides[:-1] + (n_step * dat.strides[-1],
+                                        dat.strides[-1]),
+            writeable=False)
+        # The output may be a view of `arr` (or have overlapping
+        # windows), so it is read-only.
+        out = out.view()
+        out.flags.writeable = False
         if isinstance(arr, np.ma.MaskedArray):
             out = np.ma.masked_where(self.reshape(arr.mask,
                                                   n_pad=n_pad,
@@ -215,17 +247,14 @@ class TimeBinner(object):
         dt2 = dt2 - dt2.mean(-1)[..., None]
         se = slice(int(n_bin // 4) - 1, None, 1)
         sb = slice(int(n_bin // 4) - 1, None, -1)
-        for slc in slice1d_along_axis(dt1.shape, -1):
-            tmp = np.correlate(dt1[slc], dt2[slc], 'valid')
+        tmp = _correlate_valid(dt1, dt2)
+        # For most bins we take the average of the two sides.
+        out[:] = (tmp[..., se] + tmp[..., sb]) / 2
+        if out.shape[-2] > 0:
             # The zero-padding in reshape means we compute coherence
             # from one-sided time-series for first and last points.
-            if slc[-2] == 0:
-                out[slc] = tmp[se]
-            elif slc[-2] == dt2.shape[-2] - 1:
-                out[slc] = tmp[sb]
-            else:
-                # For the others we take the average of the two sides.
-                out[slc] = (tmp[se] + tmp[sb]) / 2
+            out[..., -1, :] = tmp[..., -1, sb]
+            out[..., 0, :] = tmp[..., 0, se]
         return out
 
     def calc_lag(self, npt=None, one_sided=False):
@@ -254,8 +283,8 @@ class TimeBinner(object):
         # Don't need to pad the second variable:
         dt2 = self.demean(indt2, n_bin=n_bin2)
         dt2 = dt2 - dt2.mean(-1)[..., None]
-        for slc in slice1d_along_axis(shp, -1):
-            out[slc] = np.correlate(dt1[slc], dt2[slc], 'valid')
+        out[:] = _correlate_valid(dt1[..., :shp[-2], :],
+                                  dt2[..., :shp[-2], :])
         if normed:
             out /= (self.std(indt1, n_bin=n_bin1)[..., :shp[-2]] *
                     self.std(indt2, n_bin=n_bin2)[..., :shp[-2]] *
@@ -282,6 +311,9 @@ class TimeBinner(object):
         if outdat is None:
             outdat = type(rawdat)()
             props['n_bin'] = self.n_bin
+            if self._parse_nstep() != self.n_bin:
+                # Only overlapping (or gapped) bins record n_step.
+                props['n_step'] = self._parse_nstep()
             props['n_fft'] = self.n_fft
         if names is None:
             names = rawdat.keys()
@@ -334,7 +366,8 @@ class TimeBinner(object):
                 outdat[ky] = copy.deepcopy(rawdat[ky])
         return outdat
 
-    def __init__(self, n_bin, fs, n_fft=None, n_fft_coh=None):
+    def __init__(self, n_bin, fs, n_fft=None, n_fft_coh=None,
+                 n_step=None):
         """
         Initialize an averaging object.
 
@@ -348,8 +381,15 @@ class TimeBinner(object):
         n_fft_coh : int
           the number of data points to use for coherence and cross-spectra ffts
           (`n_fft_coh`<=`n_bin`). Default: `n_fft_coh`=`n_bin`/6
+        n_step : int
+          the number of data points between the start of each bin.
+          If `n_step` < `n_bin`, the bins overlap (e.g., n_bin
+          for 30-minute averages, and n_step for 15 minutes, gives
+          30-minute averages every 15 minutes). Default:
+          `n_step`=`n_bin` (back-to-back bins).
         """
         self.n_bin = n_bin
+        self.n_step = n_step
         self.fs = fs
         self.n_fft = n_fft
         self.n_fft_coh = n_fft_coh
@@ -392,11 +432,17 @@ class TimeBinner(object):
         n_bin1 = self._parse_nbin(n_bin1)
         n_bin2 = self._parse_nbin(n_bin2)
         oshp = self._outshape_fft(dat1.shape, n_fft=n_fft, n_bin=n_bin1)
-        oshp[-2] = np.min([oshp[-2], dat2.shape[-1] // n_bin2])
+        oshp[-2] = np.min([oshp[-2],
+                           self._outshape(dat2.shape, n_bin=n_bin2)[-2]])
         out = np.empty(oshp, dtype=dat1.dtype)
         # The data is detrended in psd, so we don't need to do it here.
         dat1 = self.reshape(dat1, n_pad=n_fft, n_bin=n_bin1)
         dat2 = self.reshape(dat2, n_pad=n_fft, n_bin=n_bin2)
+        if dat1.shape[-1] == dat2.shape[-1]:
+            # Compute all bins at once.
+            out[:] = cohere(dat1[..., :oshp[-2], :], dat2[..., :oshp[-2], :],
+                            n_fft, debias=debias, noise=noise)
+            return out
         for slc in slice1d_along_axis(out.shape, -1):
             out[slc] = cohere(dat1[slc], dat2[slc],
                               n_fft, debias=debias, noise=noise)
@@ -428,19 +474,20 @@ class TimeBinner(object):
         n_bin1 = self._parse_nbin(n_bin1)
         n_bin2 = self._parse_nbin(n_bin2)
         oshp = self._outshape_fft(dat1.shape, n_fft=n_fft, n_bin=n_bin1)
-        oshp[-2] = np.min([oshp[-2], dat2.shape[-1] // n_bin2])
+        oshp[-2] = np.min([oshp[-2],
+                           self._outshape(dat2.shape, n_bin=n_bin2)[-2]])
         # The data is detrended in psd, so we don't need to do it here:
         dat1 = self.reshape(dat1, n_pad=n_fft)
         dat2 = self.reshape(dat2, n_pad=n_fft)
         out = np.empty(oshp, dtype='c{}'.format(dat1.dtype.itemsize * 2))
         if dat1.shape == dat2.shape:
-            cross = cpsd
-        else:
-            cross = cpsd_quasisync
+            # Compute all bins at once (in radian units).
+            out[:] = cpsd(dat1, dat2, n_fft, 2 * np.pi * fs, window=window)
+            return out
         for slc in slice1d_along_axis(out.shape, -1):
             # PSD's are computed in radian units:
-            out[slc] = cross(dat1[slc], dat2[slc], n_fft,
-                             2 * np.pi * fs, window=window)
+            out[slc] = cpsd_quasisync(dat1[slc], dat2[slc], n_fft,
+                                      2 * np.pi * fs, window=window)
         return out
 
     def phase_angle(self, dat1, dat2, window='hann',
@@ -468,17 +515,56 @@ class TimeBinner(object):
         n_bin1 = self._parse_nbin(n_bin1)
         n_bin2 = self._parse_nbin(n_bin2)
         oshp = self._outshape_fft(dat1.shape, n_fft=n_fft, n_bin=n_bin1)
-        oshp[-2] = np.min([oshp[-2], dat2.shape[-1] // n_bin2])
+        oshp[-2] = np.min([oshp[-2],
+                           self._outshape(dat2.shape, n_bin=n_bin2)[-2]])
         # The data is detrended in psd, so we don't need to do it here:
         dat1 = self.reshape(dat1, n_pad=n_fft)
         dat2 = self.reshape(dat2, n_pad=n_fft)
         out = np.empty(oshp, dtype='c{}'.format(dat1.dtype.itemsize * 2))
+        if dat1.shape[-1] == dat2.shape[-1]:
+            # Compute all bins at once.
+            out[:] = phase_angle(dat1[..., :oshp[-2], :],
+                                 dat2[..., :oshp[-2], :],
+                                 n_fft, window=window)
+            return out
         for slc in slice1d_along_axis(out.shape, -1):
             # PSD's are computed in radian units:
             out[slc] = phase_angle(dat1[slc], dat2[slc], n_fft,
                                    window=window)
         return out
 
+    def spec_products(self, dat, fs=None, window='hann',
+                      n_bin=None, n_fft=None, step=None, n_pad=None):
+        """
+        Compute the fft's of the signals in `dat` once, for computing
+        their spectra, cross-spectra, coherence and phase.
+
+        Parameters
+        ----------
+        dat : np.ndarray, or list of np.ndarray
+          The raw-data signals (e.g., the components of velocity).
+          Each element of the first dimension is a signal.
+        window : string
+          String indicating the window function to use (default: 'hanning').
+
+        The other parameters are the same as for :meth:`psd`.
+
+        Returns
+        -------
+        spec : :class:`dolfyn.tools.psd.SpecProducts`
+          The spectral products of the signals, e.g. ``spec.psd(0)``
+          is the same as ``self.psd(dat[0])``. They are computed in
+          radian units.
+        """
+        fs = self._parse_fs(fs)
+        n_bin = self._parse_nbin(n_bin)
+        n_fft = self._parse_nfft(n_fft)
+        if n_pad is None:
+            n_pad = min(n_bin - n_fft, n_fft)
+        return SpecProducts([self.reshape(d, n_pad=n_pad, n_bin=n_bin)
+                             for d in dat],
+                            n_fft, 2 * np.pi * fs, window=window, step=step)
+
     def psd(self, dat, fs=None, window='hann', noise=0,
             n_bin=None, n_fft=None, step=None, n_pad=None):
         """
@@ -490,9 +576,11 @@ class TimeBinner(object):
           The raw-data array of which to calculate the psd.
         window : string
           String indicating the window function to use (default: 'hanning').
-        noise  : float
+        noise  : float, or list of floats
           The white-noise level of the measurement (in the same units
-          as `dat`).
+          as `dat`). If this is a list, it is the noise level of each
+          element of the first dimension of `dat` (e.g., each
+          component of velocity).
 
         """
         fs = self._parse_fs(fs)
@@ -500,13 +588,10 @@ class TimeBinner(object):
         n_fft = self._parse_nfft(n_fft)
         if n_pad is None:
             n_pad = min(n_bin - n_fft, n_fft)
-        out = np.empty(self._outshape_fft(dat.shape, n_fft=n_fft, n_bin=n_bin))
         # The data is detrended in psd, so we don't need to do it here.
         dat = self.reshape(dat, n_pad=n_pad)
-        for slc in slice1d_along_axis(dat.shape, -1):
-            # PSD's are computed in radian units:
-            out[slc] = psd(dat[slc], n_fft, 2 * np.pi * fs,
-                           window=window, step=step)
+        # PSD's are computed in radian units (all bins at once):
+        out = psd(dat, n_fft, 2 * np.pi * fs, window=window, step=step)
         if ma.valid and ma.marray in dat.__class__.__mro__:
             out = ma.marray(
                 out,
@@ -516,9 +601,61 @@ class TimeBinner(object):
                 )
             # The dat.meta.dim_names[:-1] drops the 'time2' dim_name.
 
-        if noise != 0:
-            # the two in 2*np.pi cancels with the two in 'self.fs/2':
-            out -= noise**2 / (np.pi * fs)
-            # Make sure all values of the PSD are >0 (but still small):
-            out[out < 0] = np.min(np.abs(out)) / 100
+        if np.ndim(noise) == 0:
+            _remove_noise(out, noise, fs)
+        else:
+            for idx, nse in enumerate(noise):
+                _remove_noise(out[idx], nse, fs)
         return out
+
+
+def _fast_len(n):
+    """The smallest number >= `n` with no prime factors other than 2,
+    3 and 5 (for which fft's are fast)."""
+    best = 1
+    while best < n:
+        best *= 2
+    p35 = 1
+    while p35 < best:
+        p = p35
+        while p < best:
+            p235 = p
+            while p235 < n:
+                p235 *= 2
+            best = min(best, p235)
+            p *= 3
+        p35 *= 5
+    return best
+
+
+def _correlate_valid(a, v):
+    """
+    Compute ``np.correlate(a, v, 'valid')`` along the last axis of `a`
+    and `v` (for all of the other dimensions at once), using fft's.
+
+    The last dimension of `a` must be at least as long as that of
+    `v`.
+    """
+    n_a, n_v = a.shape[-1], v.shape[-1]
+    # The circular correlation of length >= n_a has no wrap-around
+    # in the 'valid' range.
+    n_fft = _fast_len(n_a)
+    if np.iscomplexobj(a) or np.iscomplexobj(v):
+        fft, ifft = np.fft.fft, np.fft.ifft
+        dtype = np.complex128
+    else:
+        fft, ifft = np.fft.rfft, np.fft.irfft
+        dtype = np.float64
+    out = ifft(fft(np.asarray(a, dtype=dtype), n_fft) *
+               np.conj(fft(np.asarray(v, dtype=dtype), n_fft)), n_fft)
+    return out[..., :n_a - n_v + 1]
+
+
+def _remove_noise(spec, noise, fs):
+    """Remove the white-noise level `noise` from the psd `spec` (in
+    place)."""
+    if noise != 0:
+        # the two in 2*np.pi cancels with the two in 'self.fs/2':
+        spec -= noise**2 / (np.pi * fs)
+        # Make sure all values of the PSD are >0 (but still small):
+        spec[spec < 0] = np.min(np.abs(spec)) / 100
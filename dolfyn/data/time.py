@@ -26,40 +26,140 @@ def _fullyear(year):
     return year
 
 
+# The positions of the digits in '%Y-%m-%dT%H:%M:%S' strings.
+_iso_digits = [0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15, 17, 18]
+_iso_seps = [(4, '-'), (7, '-'), (10, 'T'), (13, ':'), (16, ':')]
+
+
+def _valid_isotime(val):
+    """Return whether each string in the unicode array `val` has the
+    '%Y-%m-%dT%H:%M:%S' format, with optional fractional seconds (and
+    no time zone).
+    """
+    n = val.dtype.itemsize // 4
+    if n < 19:
+        return np.zeros(val.shape, dtype=bool)
+    # The unicode code points of each character (0 is padding), with
+    # room for at least one fractional-second digit.
+    n = max(n, 21)
+    c = val.astype('U{}'.format(n)).view(np.uint32).reshape(val.shape + (n, ))
+    isdigit = (c >= ord('0')) & (c <= ord('9'))
+    out = isdigit[..., _iso_digits].all(-1)
+    for idx, sep in _iso_seps:
+        out &= c[..., idx] == ord(sep)
+    pad = c[..., 19:] == 0
+    out &= (pad[..., 0] |
+            ((c[..., 19] == ord('.')) & isdigit[..., 20] &
+             (isdigit[..., 20:] | pad[..., 1:]).all(-1) &
+             # Nothing follows the padding.
+             (pad[..., 1:] >= pad[..., :-1]).all(-1)))
+    return out
+
+
 def isotime2mpltime(val):
+    """Convert ISO 8601 time strings ('%Y-%m-%dT%H:%M:%S', with
+    optional fractional seconds) to mpltime.
+
+    Parameters
+    ----------
+    val : string, or list/array of strings
+
+    Returns
+    -------
+    mpltime : float, or |np.ndarray| of floats
+
+    Raises
+    ------
+    ValueError : If a string does not have this format (e.g., it is
+      empty, 'NaT', or it has a time zone).
+    """
     if isinstance(val, string_types):
-        return date2num(datetime.strptime(val, '%Y-%m-%dT%H:%M:%S'))
-    elif isinstance(val, (tuple, list)):
-        out = np.empty(len(val), dtype=np.float64)
-    elif isinstance(val, np.ndarray):
-        out = np.empty(len(val), dtype=np.float64)
-    else:
+        return float(isotime2mpltime([val])[0])
+    elif not isinstance(val, (tuple, list, np.ndarray)):
+        raise ValueError("Invalid time type.")
+    val = np.asarray(val)
+    if val.size == 0:
+        return np.empty(val.shape, dtype=np.float64)
+    if val.dtype.kind in 'OS':
+        val = val.astype('U')
+    if val.dtype.kind != 'U':
         raise ValueError("Invalid time type.")
-    for idx, v in enumerate(val):
-        out[idx] = isotime2mpltime(v)
+    valid = _valid_isotime(val)
+    if not valid.all():
+        raise ValueError("Invalid ISO 8601 time string: '{}'."
+                         .format(val[~valid].flat[0]))
+    # numpy parses ISO 8601 strings in a (fast) vectorized way.
+    return M82num(val.astype('M8[us]'))
+
+
+def num2M8(mpltime):
+    """Convert mpltime to a numpy datetime64[us] array.
+
+    This is the vectorized equivalent of :func:`num2date`: the
+    values are rounded to the microsecond the same way. NaN values
+    are NaT.
+    """
+    mpltime = np.asarray(mpltime, dtype=np.float64)
+    days = np.floor(mpltime)
+    # `timedelta(days=frac)` rounds (half-to-even) to the microsecond.
+    us = np.round((mpltime - days) * 86400e6)
+    bad = np.isnan(mpltime)
+    days = np.where(bad, 0, days).astype(np.int64) - 719163
+    out = (days.astype('M8[D]').astype('M8[us]') +
+           np.where(bad, 0, us).astype(np.int64).astype('m8[us]'))
+    out[bad] = np.datetime64('NaT')
     return out
 
 
 def num2date(mpltime):
-    if isinstance(mpltime, np.ndarray):
-        try:
-            n = len(mpltime)
-        except TypeError:
-            pass
-        else:
-            out = np.empty(n, dtype='O')
-            for idx, val in enumerate(mpltime.flat):
-                out[idx] = num2date(val)
-            out.shape = mpltime.shape
-            return out
+    if isinstance(mpltime, np.ndarray) and mpltime.ndim > 0:
+        # datetime64[us] arrays convert to datetime objects.
+        return num2M8(mpltime).astype('O')
     return datetime.fromordinal(int(mpltime)) + timedelta(days=mpltime % 1)
 
 
+def _M8_fields(dt):
+    """Return the calendar fields of the datetime64 array `dt`.
+    """
+    dt = dt.astype('M8[us]')
+    day = dt.astype('M8[D]')
+    month = day.astype('M8[M]')
+    year = month.astype('M8[Y]')
+    us = (dt - day).astype(np.int64)
+    return dict(ordinal=day.astype(np.int64) + 719163,
+                year=year.astype(np.int64) + 1970,
+                month=(month - year).astype(np.int64) + 1,
+                day=(day - month).astype(np.int64) + 1,
+                hour=us // 3600000000,
+                minute=us // 60000000 % 60,
+                second=us // 1000000 % 60,
+                microsecond=us % 1000000)
+
+
+def M82num(dt):
+    """Convert a numpy datetime64 array to mpltime.
+
+    This is the vectorized equivalent of :func:`date2num`, and it
+    returns identical values. NaT values are NaN.
+    """
+    dt = np.asarray(dt).astype('M8[us]')
+    f = _M8_fields(dt)
+    out = (f['ordinal'] +
+           (((f['microsecond'] / 1e6 +
+              f['second']) / 60 +
+             f['minute']) / 60 +
+            f['hour']) / 24)
+    return np.where(np.isnat(dt), np.NaN, out)
+
+
 def date2num(dt):
     if isinstance(dt, np.ndarray):
-        out = np.empty(len(dt), dtype=np.float64)
-        for idx, val in enumerate(dt.flat):
-            out[idx] = date2num(val)
+        if dt.dtype.kind == 'M':
+            return M82num(dt)
+        # For object arrays of datetimes, this is faster than
+        # converting them to datetime64.
+        out = np.fromiter((date2num(val) for val in dt.flat),
+                          dtype=np.float64, count=dt.size)
         out.shape = dt.shape
         return out
     return (dt.toordinal() +
@@ -69,6 +169,46 @@ def date2num(dt):
              dt.hour) / 24)
 
 
+def ymdhms2num(year, month, day, hour=0, minute=0, second=0,
+               microsecond=0):
+    """Convert arrays of calendar fields to mpltime.
+
+    This is a vectorized equivalent of
+    ``date2num(datetime(year, month, day, hour, minute, second,
+    microsecond))``, and it returns identical values.
+
+    Parameters
+    ----------
+    year, month, day, hour, minute, second, microsecond : array_like
+      The calendar fields. These are broadcast against each other.
+
+    Returns
+    -------
+    mpltime : |np.ndarray| (float64)
+      The time in mpltime format. Elements with invalid fields (for
+      which `datetime` would raise an error) are NaN.
+    """
+    year, month, day = [np.asarray(v, dtype=np.int64)
+                        for v in (year, month, day)]
+    hour, minute, second, microsecond = [
+        np.asarray(v, dtype=np.float64)
+        for v in (hour, minute, second, microsecond)]
+    ym = (year - 1970).astype('M8[Y]').astype('M8[M]') + (month - 1)
+    d0 = ym.astype('M8[D]')
+    ndays = ((ym + 1).astype('M8[D]') - d0).astype(np.int64)
+    ordinal = (d0 + (day - 1)).astype(np.int64) + 719163
+    out = ordinal + (((microsecond / 1e6 + second) / 60 +
+                      minute) / 60 + hour) / 24
+    valid = ((year >= 1) & (year <= 9999) &
+             (month >= 1) & (month <= 12) &
+             (day >= 1) & (day <= ndays) &
+             (0 <= hour) & (hour < 24) &
+             (0 <= minute) & (minute < 60) &
+             (0 <= second) & (second < 60) &
+             (0 <= microsecond) & (microsecond < 1e6))
+    return np.where(valid, out, np.NaN)
+
+
 def mpltime2matlab_datenum(time):
     return time.view(np.ndarray) + 366
 
@@ -90,53 +230,43 @@ class time_array(np.ndarray):
             self._datetime = num2date(self)
         return self._datetime
 
+    @property
+    def datetime64(self,):
+        """The time as a numpy datetime64[us] array.
+        """
+        if not hasattr(self, '_datetime64'):
+            self._datetime64 = num2M8(self)
+        return self._datetime64
+
+    def _field(self, name, dtype):
+        if not hasattr(self, '_fields'):
+            # Compute (and cache) all of the fields at once.
+            self._fields = _M8_fields(self.datetime64)
+        return self._fields[name].astype(dtype)
+
     @property
     def year(self,):
-        out = np.empty(len(self), dtype=np.uint16)
-        for idx, val in enumerate(self.datetime.flat):
-            out[idx] = val.year
-        out.shape = self.shape
-        return out
+        return self._field('year', np.uint16)
 
     @property
     def month(self,):
-        out = np.empty(len(self), dtype=np.uint8)
-        for idx, val in enumerate(self.datetime.flat):
-            out[idx] = val.month
-        out.shape = self.shape
-        return out
+        return self._field('month', np.uint8)
 
     @property
     def day(self,):
-        out = np.empty(len(self), dtype=np.uint8)
-        for idx, val in enumerate(self.datetime.flat):
-            out[idx] = val.day
-        out.shape = self.shape
-        return out
+        return self._field('day', np.uint8)
 
     @property
     def hour(self,):
-        out = np.empty(len(self), dtype=np.uint8)
-        for idx, val in enumerate(self.datetime.flat):
-            out[idx] = val.hour
-        out.shape = self.shape
-        return out
+        return self._field('hour', np.uint8)
 
     @property
     def minute(self,):
-        out = np.empty(len(self), dtype=np.uint8)
-        for idx, val in enumerate(self.datetime.flat):
-            out[idx] = val.minute
-        out.shape = self.shape
-        return out
+        return self._field('minute', np.uint8)
 
     @property
     def second(self,):
-        out = np.empty(len(self), dtype=np.uint8)
-        for idx, val in enumerate(self.datetime.flat):
-            out[idx] = val.second
-        out.shape = self.shape
-        return out
+        return self._field('second', np.uint8)
 
     @property
     def matlab_datenum(self,):
@@ -22,13 +22,13 @@ class Velocity(TimeData):
     @property
     def n_time(self, ):
         try:
-            return self['mpltime'].shape[-1]
+            return self._get_stored('mpltime').shape[-1]
         except KeyError:
-            return self['vel'].shape[-1]
+            return self._get_stored('vel').shape[-1]
 
     @property
     def shape(self,):
-        return self.u.shape
+        return self._get_stored('vel').shape[1:]
 
     @property
     def U_mag(self,):
@@ -213,11 +213,21 @@ class VelBinner(TimeBinner):
     def do_tke(self, indat, out=None):
         if out is None:
             out = VelTkeData()
-        out['tke_vec'] = self.calc_tke(indat['vel'])
-        out['stress'] = self.calc_stress(indat['vel'])
+        # Detrend the velocity once, for both tke and stress.
+        vel = self.detrend(indat['vel'][:3])
+        out['tke_vec'] = self.calc_tke(vel, detrend=False)
+        out['stress'] = self.calc_stress(vel, detrend=False)
         return out
 
-    def do_spec(self, indat, out=None, names=['vel']):
+    def do_spec(self, indat, out=None, names=['vel'], cross=False):
+        """
+        Calculate the spectra of the velocity (`names`) in `indat`.
+
+        If `cross` is True, the cross-spectra are also calculated
+        (see :meth:`do_cross_spec`). When the cross-spectra use the
+        same segments as the spectra (``2 * n_fft <= n_bin``), both
+        are computed from one set of fft's.
+        """
         if out is None:
             out = FreqData()
             out['props'] = dict(fs=indat['props']['fs'],
@@ -225,7 +235,18 @@ class VelBinner(TimeBinner):
                                 n_bin=self.n_bin)
             out['omega'] = self.calc_omega()
         for nm in names:
+            if cross and 2 * self.n_fft <= self.n_bin:
+                # calc_vel_cpsd pads with n_fft points, which is
+                # the same as calc_vel_psd in this case.
+                spec = self.spec_products(indat[nm][:3], n_pad=self.n_fft)
+                out[nm] = np.array([spec.psd(idx) for idx in range(3)],
+                                   dtype=np.float32)
+                out[nm + '_cross'] = np.array(
+                    [spec.cpsd(*pair) for pair in self._cross_pairs])
+                continue
             out[nm] = self.calc_vel_psd(indat[nm])
+            if cross:
+                out[nm + '_cross'] = self.calc_vel_cpsd(indat[nm])
         return out
 
     def do_cross_spec(self, indat, out=None, names=['vel']):
@@ -235,7 +256,7 @@ class VelBinner(TimeBinner):
             out[nm + '_cross'] = self.calc_vel_cpsd(indat[nm])
         return out
 
-    def calc_tke(self, veldat, noise=[0, 0, 0]):
+    def calc_tke(self, veldat, noise=[0, 0, 0], detrend=True):
         """Calculate the tke (variances of u,v,w).
 
         Parameters
@@ -246,18 +267,24 @@ class VelBinner(TimeBinner):
         noise : a three-element vector of the noise levels of the
                 velocity data for ach component of velocity.
 
+        detrend : If False, `veldat` is the already binned and
+                  detrended velocity (i.e., the output of
+                  ``self.detrend(veldat[:3])``).
+
         Returns
         -------
         out : An array of tke values.
         """
-        out = np.mean(self.detrend(veldat[:3]) ** 2,
+        if detrend:
+            veldat = self.detrend(veldat[:3])
+        out = np.mean(veldat ** 2,
                       -1, dtype=np.float64).astype('float32')
         out[0] -= noise[0] ** 2
         out[1] -= noise[1] ** 2
         out[2] -= noise[2] ** 2
         return out
 
-    def calc_stress(self, veldat):
+    def calc_stress(self, veldat, detrend=True):
         """Calculate the stresses (cross-covariances of u,v,w).
 
         Parameters
@@ -265,18 +292,21 @@ class VelBinner(TimeBinner):
         veldat : a velocity data array. The last dimension is assumed
                  to be time.
 
+        detrend : If False, `veldat` is the already binned and
+                  detrended velocity (see :meth:`calc_tke`).
+
         Returns
         -------
         out : An array of stress values.
         """
-        out = np.empty(self._outshape(veldat[:3].shape)[:-1],
-                       dtype=np.float32)
+        if detrend:
+            # Detrend each component once (not once for each pair).
+            veldat = self.detrend(veldat[:3])
+        out = np.empty(veldat.shape[:-1], dtype=np.float32)
         for idx, p in enumerate(self._cross_pairs):
-            out[idx] = np.mean(
-                self.detrend(veldat[p[0]]) *
-                self.detrend(veldat[p[1]]),
-                -1, dtype=np.float64
-            ).astype(np.float32)
+            out[idx] = np.mean(veldat[p[0]] * veldat[p[1]],
+                               -1, dtype=np.float64
+                               ).astype(np.float32)
         return out
 
     def calc_vel_psd(self, veldat,
@@ -323,7 +353,7 @@ class VelBinner(TimeBinner):
         veldat = veldat.copy()
         if rotate_u:
             tmpdat = self.reshape(veldat[0] + 1j * veldat[1])
-            tmpdat *= np.exp(-1j * np.angle(tmpdat.mean(-1)))
+            tmpdat = tmpdat * np.exp(-1j * np.angle(tmpdat.mean(-1)))
             veldat[0] = tmpdat.real
             veldat[1] = tmpdat.imag
             if noise[0] != noise[1]:
@@ -332,12 +362,11 @@ class VelBinner(TimeBinner):
                     'noise-correction cannot be done here when '
                     'rotating velocity.')
                 noise[0] = noise[1] = 0
-        out = np.empty(self._outshape_fft(veldat[:3].shape, ),
-                       dtype=np.float32)
-        for idx in range(3):
-            out[idx] = self.psd(veldat[idx], fs=fs, noise=noise[idx],
-                                window=window, n_bin=n_bin,
-                                n_pad=n_pad, n_fft=n_fft, step=step,)
+        # Compute the spectra of the three components at once.
+        out = self.psd(veldat[:3], fs=fs, noise=noise[:3],
+                       window=window, n_bin=n_bin,
+                       n_pad=n_pad, n_fft=n_fft, step=step,
+                       ).astype(np.float32)
         if ma.valid:
             if self.hz:
                 units = ma.unitsDict({'s': -2, 'm': -2, 'hz': -1})
@@ -391,7 +420,7 @@ class VelBinner(TimeBinner):
         veldat = veldat.copy()
         if rotate_u:
             tmpdat = self.reshape(veldat[0] + 1j * veldat[1])
-            tmpdat *= np.exp(-1j * np.angle(tmpdat.mean(-1)))
+            tmpdat = tmpdat * np.exp(-1j * np.angle(tmpdat.mean(-1)))
             veldat[0] = tmpdat.real
             veldat[1] = tmpdat.imag
         out = np.empty(self._outshape_fft(veldat[:3].shape, ), dtype='complex')
@@ -195,4 +195,11 @@ class bin_reader(object):
         return self.read(n, 'l')
 
     def read_nbytes(self, n):
-        self.f.read(n)
+        """
+        Read `n` bytes, and return them without decoding.
+        """
+        val = self.f.read(n)
+        if len(val) < n:
+            raise eofException
+        self.cs and self.cs.add(val)
+        return val
@@ -3,18 +3,101 @@ from .nortek2 import read_signature
 from .rdi import read_rdi
 from .base import WrongFileType as _WTF
 # These are included here for use in the API
-from .main import load
+from .hdf5 import load
+from .cache import load_cache, ReadCache
 
 
-def read(fname, userdata=True, nens=None):
+# The file format registry. Each entry is a (magic, reader) pair,
+# where `magic` is the byte string that files of that format begin
+# with.
+_format_registry = [
+    (b'\xa5\x05', read_nortek),  # Nortek Vector, AWAC, Aquadopp
+    (b'\xa5\x0a', read_signature),  # Nortek AD2CP
+    (b'\x7f\x7f', read_rdi),  # RDI PD0
+]
+
+
+def register_format(magic, reader):
+    """Register a reader function for a file format.
+
+    Parameters
+    ==========
+    magic : bytes
+      The bytes that files of this format begin with.
+    reader : callable
+      The reader function. It is called as ``reader(fname,
+      userdata=userdata, nens=nens)``.
+
+    Notes
+    =====
+    Formats that are registered with this function take precedence
+    over the default ones.
+    """
+    _format_registry.insert(0, (magic, reader))
+
+
+def sniff_reader(fname):
+    """Identify the reader for a file from its first bytes.
+
+    Returns
+    =======
+    reader : callable or None
+      The reader function for the file, or None if the first bytes do
+      not match any entry in the format registry.
+    """
+    nbyte = max(len(magic) for magic, reader in _format_registry)
+    with open(fname, 'rb') as fl:
+        head = fl.read(nbyte)
+    for magic, reader in _format_registry:
+        if head.startswith(magic):
+            return reader
+    return None
+
+
+def read(fname, userdata=True, nens=None, cache=False):
     """Read a binary Nortek (e.g., .VEC, .wpr, .ad2cp, etc.) or RDI
     (.000, .PD0, etc.) data file.
 
+    Parameters
+    ==========
+    fname : string
+      The filename of the file to read.
+    userdata : True, False, or string
+      Whether to read the '<base-filename>.userdata.json' file (or
+      the name of the json file to read).
+    nens : int, or tuple of 2 ints
+      The number of ensembles to read.
+    cache : bool, string or :class:`ReadCache <dolfyn.io.cache.ReadCache>`
+      Whether to use a cache of decoded files, so that reading the
+      same file again loads the (memory-mapped) decoded data instead
+      of decoding it. This can be True (use the default cache
+      directory), a cache directory, or a `ReadCache` object.
+
     Notes
     =====
-    This function will loop over binary readers until it finds one that works.
+    The file type is identified from the first bytes of the file (see
+    `register_format`). If these are not recognized (e.g., because
+    there is junk at the beginning of the file), this function will
+    loop over binary readers until it finds one that works.
     """
-    for func in [read_nortek, read_signature, read_rdi]:
+    if cache is False or cache is None:
+        return _read(fname, userdata=userdata, nens=nens)
+    if not isinstance(cache, ReadCache):
+        cache = ReadCache(None if cache is True else cache)
+    return cache.read(_read, fname, userdata=userdata, nens=nens)
+
+
+def _read(fname, userdata=True, nens=None):
+    sniffed = sniff_reader(fname)
+    if sniffed is not None:
+        try:
+            return sniffed(fname, userdata=userdata, nens=nens)
+        except _WTF:
+            # The first bytes were misleading, so try the other readers.
+            pass
+    for magic, func in _format_registry:
+        if func is sniffed:
+            continue
         try:
             dat = func(fname, userdata=userdata, nens=nens)
         except _WTF:
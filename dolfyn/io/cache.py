@@ -0,0 +1,369 @@
+"""
+A native, memory-mappable on-disk format for dolfyn data objects.
+
+A 'cache' is a directory that contains one ``.npy`` file for each
+array in the data object (in sub-directories that mirror the data
+groups), and a JSON manifest (``manifest.json``) that describes the
+group structure, the class of each object, and all of the non-array
+values (props, config, etc.).
+
+Because the arrays are plain ``.npy`` files, they can be opened with
+``np.load(..., mmap_mode='r')``, so that opening a cache takes no
+time and does not read the data until it is used.
+"""
+from __future__ import division
+import os
+import json
+import shutil
+import base64
+import warnings
+import hashlib
+import importlib
+import numpy as np
+import six
+from .._version import __version__
+from ..data.base import LazyArray
+
+if six.PY3:
+    import pickle as pkl
+else:  # Python 2
+    import cPickle as pkl
+
+MANIFEST = 'manifest.json'
+FORMAT_VERSION = 1
+# The number of time steps of lazily-loaded arrays to copy at once.
+_slab_size = 2 ** 16
+
+
+def _cls2str(cls):
+    return '{}:{}'.format(cls.__module__, cls.__name__)
+
+
+def _str2cls(clsstr):
+    mod, name = clsstr.split(':')
+    return getattr(importlib.import_module(mod), name)
+
+
+def _encode(val, path, root):
+    """
+    Return the JSON-able description of `val`. Arrays are saved to
+    the file `path` + '.npy' (relative to `root`).
+    """
+    if isinstance(val, dict) and all(isinstance(ky, six.string_types)
+                                     for ky in val):
+        if path:
+            os.makedirs(os.path.join(root, path))
+        return {'__group__': _cls2str(type(val)),
+                'items': dict((ky, _encode(dict.__getitem__(val, ky),
+                                           os.path.join(path, ky), root))
+                              for ky in val)}
+    if isinstance(val, LazyArray):
+        # Copy lazily-loaded arrays in slabs along the (last) time
+        # dimension, so that they are not read into memory at once.
+        fname = path + '.npy'
+        out = np.lib.format.open_memmap(os.path.join(root, fname), mode='w+',
+                                        dtype=val.dtype, shape=val.shape)
+        if val.ndim == 0:
+            out[()] = val.load()
+        else:
+            for i0 in range(0, val.shape[-1], _slab_size):
+                slc = (Ellipsis, slice(i0, i0 + _slab_size))
+                out[slc] = val[slc]
+        del out
+        return {'__array__': fname.replace(os.sep, '/'),
+                '__pyclass__': _cls2str(val.view or np.ndarray)}
+    if isinstance(val, np.ndarray) and val.dtype != 'O':
+        fname = path + '.npy'
+        np.save(os.path.join(root, fname), np.asarray(val),
+                allow_pickle=False)
+        return {'__array__': fname.replace(os.sep, '/'),
+                '__pyclass__': _cls2str(type(val))}
+    if (isinstance(val, (bool, type(None), float) + six.integer_types +
+                   six.string_types) and not isinstance(val, np.generic)):
+        return val
+    if isinstance(val, np.generic) and val.dtype != 'O':
+        return {'__scalar__': val.item(), 'dtype': val.dtype.str}
+    if type(val) in (list, tuple, set):
+        return {'__' + type(val).__name__ + '__':
+                [_encode(v, '{}_{}'.format(path, idx), root)
+                 for idx, v in enumerate(val)]}
+    # Everything else is pickled.
+    return {'__pickle__': base64.b64encode(
+        pkl.dumps(val, protocol=2)).decode('ascii')}
+
+
+def _decode(val, root, mmap_mode):
+    if not isinstance(val, dict):
+        return val
+    if '__group__' in val:
+        out = _str2cls(val['__group__'])()
+        for ky, v in six.iteritems(val['items']):
+            dict.__setitem__(out, ky, _decode(v, root, mmap_mode))
+        return out
+    if '__array__' in val:
+        out = np.load(os.path.join(root, *val['__array__'].split('/')),
+                      mmap_mode=mmap_mode, allow_pickle=False)
+        # This is a view (not a copy) of the memory-mapped array.
+        return out.view(_str2cls(val['__pyclass__']))
+    if '__scalar__' in val:
+        return np.dtype(val['dtype']).type(val['__scalar__'])
+    for typ in (list, tuple, set):
+        ky = '__' + typ.__name__ + '__'
+        if ky in val:
+            return typ(_decode(v, root, mmap_mode) for v in val[ky])
+    if '__pickle__' in val:
+        return pkl.loads(base64.b64decode(val['__pickle__']))
+    raise ValueError("Invalid cache manifest entry: {}".format(val))
+
+
+def is_cache(path):
+    """Test whether `path` is a dolfyn cache directory.
+    """
+    return os.path.isfile(os.path.join(path, MANIFEST))
+
+
+def save_cache(dat, path):
+    """
+    Save a data object to the cache directory `path`.
+
+    Parameters
+    ----------
+    dat : :class:`dolfyn.data.base.data`
+      The data object to save.
+    path : string
+      The directory to write. If it is an existing cache, it is
+      replaced.
+
+    See Also
+    --------
+    load_cache
+    """
+    if os.path.exists(path):
+        if not is_cache(path):
+            raise ValueError("'{}' exists, and is not a dolfyn cache."
+                             .format(path))
+        shutil.rmtree(path)
+    os.makedirs(path)
+    manifest = {'__package_name__': 'dolfyn',
+                '__version__': __version__,
+                'format_version': FORMAT_VERSION,
+                'data': _encode(dat, '', path)}
+    with open(os.path.join(path, MANIFEST), 'w') as fl:
+        json.dump(manifest, fl, indent=1, sort_keys=True)
+
+
+def load_cache(path, mmap_mode='r'):
+    """
+    Load a data object from the cache directory `path`.
+
+    Parameters
+    ----------
+    path : string
+      The cache directory (written by :func:`save_cache`).
+    mmap_mode : {'r', 'c', 'r+', None}
+      The memory-map mode for the arrays (see `numpy.load`). The
+      default ('r') opens the arrays read-only, without reading
+      them into memory; use 'c' (copy-on-write) if you want to
+      modify the arrays in memory, or None to read them into
+      memory.
+
+    Returns
+    -------
+    dat : :class:`dolfyn.data.base.data`
+      The data object.
+    """
+    if not is_cache(path):
+        raise ValueError("'{}' is not a dolfyn cache.".format(path))
+    with open(os.path.join(path, MANIFEST)) as fl:
+        manifest = json.load(fl)
+    if manifest.get('format_version', 0) > FORMAT_VERSION:
+        raise ValueError("This cache was written by a newer version of "
+                         "dolfyn ({}).".format(manifest['__version__']))
+    return _decode(manifest['data'], path, mmap_mode)
+
+
+def _file_fingerprint(fname, nbyte=2 ** 20):
+    """
+    Return a fingerprint of the file `fname`: its size, mtime and the
+    md5 hash of its first and last `nbyte` bytes.
+    """
+    stat = os.stat(fname)
+    md5 = hashlib.md5()
+    with open(fname, 'rb') as fl:
+        md5.update(fl.read(nbyte))
+        if stat.st_size > nbyte:
+            fl.seek(max(nbyte, stat.st_size - nbyte))
+            md5.update(fl.read(nbyte))
+    return [stat.st_size, stat.st_mtime, md5.hexdigest()]
+
+
+def _userdata_fingerprint(fname, userdata):
+    if userdata is True:
+        # The readers look for these files.
+        fnames = [fname.rsplit('.', 1)[0] + '.userdata.json',
+                  fname + '.userdata.json']
+    elif isinstance(userdata, six.string_types):
+        fnames = [userdata]
+    else:
+        return repr(userdata)
+    return [_file_fingerprint(fnm) for fnm in fnames
+            if os.path.isfile(fnm)]
+
+
+class ReadCache(object):
+    """
+    A cache of decoded data files.
+
+    The cache is a directory of caches (see :func:`save_cache`), one
+    for each (raw file, read arguments) combination. Entries are
+    keyed on the raw file's size, modification time and a hash of its
+    first and last MB (so that it does not matter where the file
+    is), the dolfyn version, and the read arguments.
+
+    Parameters
+    ----------
+    path : string
+      The cache directory. The default is the ``DOLFYN_CACHE_DIR``
+      environment variable, or ``~/.cache/dolfyn``.
+    max_size : int
+      The maximum size of the cache (in bytes). When this is
+      exceeded, the least-recently used entries are deleted. The
+      default is the ``DOLFYN_CACHE_SIZE`` environment variable, or
+      10 GB.
+    mmap_mode : {'c', 'r', None}
+      The memory-map mode for the arrays of cached data (see
+      :func:`load_cache`). The default, 'c' (copy-on-write), allows
+      the arrays to be modified in memory.
+
+    Examples
+    --------
+    Use a cache on a shared processing server::
+
+        >>> cache = ReadCache('/data/dolfyn_cache', max_size=100e9)
+        >>> dat = dolfyn.read('vector_data01.VEC', cache=cache)
+    """
+
+    def __init__(self, path=None, max_size=None, mmap_mode='c'):
+        if path is None:
+            path = os.environ.get(
+                'DOLFYN_CACHE_DIR',
+                os.path.join(os.path.expanduser('~'), '.cache', 'dolfyn'))
+        if max_size is None:
+            max_size = float(os.environ.get('DOLFYN_CACHE_SIZE', 10e9))
+        self.path = path
+        self.max_size = max_size
+        self.mmap_mode = mmap_mode
+
+    def key(self, fname, **read_kwargs):
+        """
+        Return the cache key for reading `fname` with `read_kwargs`, or
+        None if this read can not be cached.
+        """
+        userdata = read_kwargs.get('userdata', None)
+        if not (userdata in (None, True, False) or
+                isinstance(userdata, six.string_types)):
+            # e.g., a file object.
+            return None
+        info = {'file': _file_fingerprint(fname),
+                'userdata': _userdata_fingerprint(fname, userdata),
+                'version': __version__,
+                'format_version': FORMAT_VERSION,
+                'kwargs': sorted((ky, repr(val)) for ky, val
+                                 in six.iteritems(read_kwargs))}
+        return hashlib.sha1(json.dumps(info, sort_keys=True)
+                            .encode('utf-8')).hexdigest()
+
+    def _entries(self, ):
+        if not os.path.isdir(self.path):
+            return []
+        return [os.path.join(self.path, nm) for nm in os.listdir(self.path)
+                if is_cache(os.path.join(self.path, nm))]
+
+    def get(self, key):
+        """
+        Return the cached data for `key`, or None if it is not in the
+        cache.
+        """
+        path = os.path.join(self.path, key)
+        if not is_cache(path):
+            return None
+        try:
+            os.utime(path, None)  # Mark the entry as used.
+        except OSError:
+            pass
+        return load_cache(path, mmap_mode=self.mmap_mode)
+
+    def put(self, key, dat):
+        """
+        Store `dat` in the cache with the key `key`. Errors are
+        issued as warnings, because the cache is optional.
+        """
+        path = os.path.join(self.path, key)
+        tmp = '{}.tmp-{}'.format(path, os.getpid())
+        try:
+            if not os.path.isdir(self.path):
+                try:
+                    os.makedirs(self.path)
+                except OSError:
+                    # Another process created it.
+                    if not os.path.isdir(self.path):
+                        raise
+            save_cache(dat, tmp)
+            try:
+                # This is atomic, so that other processes never see
+                # partially written entries.
+                os.rename(tmp, path)
+            except OSError:
+                # Another process wrote this entry first.
+                if not os.path.isdir(path):
+                    raise
+            self.evict()
+        except Exception as err:
+            # The cache is optional, so failing to write it should not
+            # fail the read.
+            warnings.warn("Could not write the cache entry '{}': {}"
+                          .format(path, err))
+        finally:
+            if os.path.isdir(tmp):
+                shutil.rmtree(tmp, ignore_errors=True)
+            elif os.path.exists(tmp):
+                os.remove(tmp)
+
+    def evict(self, max_size=None):
+        """
+        Delete the least-recently used entries until the cache is
+        smaller than `max_size` (default: ``self.max_size``).
+        """
+        if max_size is None:
+            max_size = self.max_size
+        entries = []
+        for path in self._entries():
+            size = sum(os.path.getsize(os.path.join(dirpath, fnm))
+                       for dirpath, dirnames, fnames in os.walk(path)
+                       for fnm in fnames)
+            entries.append((os.path.getmtime(path), size, path))
+        total = sum(ent[1] for ent in entries)
+        for mtime, size, path in sorted(entries):
+            if total <= max_size:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    def clear(self, ):
+        """Delete all entries in the cache.
+        """
+        self.evict(max_size=0)
+
+    def read(self, reader, fname, **read_kwargs):
+        """
+        Return the cached data for ``reader(fname, **read_kwargs)``,
+        or read it (and store it in the cache).
+        """
+        key = self.key(fname, **read_kwargs)
+        if key is None:
+            return reader(fname, **read_kwargs)
+        dat = self.get(key)
+        if dat is None:
+            dat = reader(fname, **read_kwargs)
+            self.put(key, dat)
+        return dat
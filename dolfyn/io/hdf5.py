@@ -9,9 +9,15 @@ this approach.
 
 
 import h5py as h5
+import numpy as np
 import sys
+from six import string_types
 from . import hdf5_legacy as legacy
-from pyDictH5.io import load_hdf5
+from pyDictH5.io import load_hdf5, hdf5_write, cls_pklstr_gen
+from pyDictH5 import pkl as pdh_pkl
+from pyDictH5 import _version as pdh_ver
+from pyDictH5.base import data as SourceDataType
+from ..data.base import LazyArray
 
 if sys.version_info >= (3, 0):
     import pickle as pkl
@@ -30,7 +36,8 @@ else:  # Python 2
         return pkl.loads(s)
 
 
-def load(fname, data_groups=None,):
+def load(fname, data_groups=None, time_range=None, index=None,
+         lazy=False, cache=True):
     """
     Load data from `fname` into class `type_map`.
 
@@ -44,12 +51,220 @@ def load(fname, data_groups=None,):
       The data groups to load (default: all groups not starting with
       '_').
 
+    time_range : (t0, t1) tuple of mpltime values
+      Only load the data for which ``t0 <= mpltime < t1``. Either
+      value may be None (no limit). `mpltime` must be monotonic.
 
+    index : slice
+      Only load this range of time indices.
+
+    lazy : bool
+      If True, the arrays are not read until they are accessed (the
+      file stays open until all of them have been read, or deleted).
+
+    cache : bool
+      Only for ``lazy=True``: whether arrays that have been read
+      should be kept in memory (True), or read from the file
+      each time they are accessed (False).
+
+    Notes
+    -----
+    When `time_range` or `index` is specified, only the hyperslabs of
+    the datasets that are needed are read from the file. This is
+    especially efficient for files that are chunked along the time
+    dimension (see :func:`save`).
+
+    With ``lazy=True`` the arrays in the data object are
+    :class:`dolfyn.data.base.LazyArray` proxies for the datasets in
+    the file. Accessing an item (e.g., ``dat.vel``) reads it; use
+    ``dat._get_stored('vel')[...]`` to read only part of it.
+    """
+    if time_range is None and index is None and not lazy:
+        if is_pydicth5(fname):
+            return load_hdf5(fname, group=data_groups)
+        else:
+            return legacy.load(fname, data_groups)
+    if not is_pydicth5(fname):
+        raise ValueError("Loading a `time_range` or `index`, or "
+                         "`lazy` loading, is only supported for "
+                         "pyDictH5 files.")
+    if not lazy:
+        with h5.File(fname, mode='r') as fl:
+            indx, n_time = _time_index(fl, time_range, index)
+            return _load(fl, data_groups, indx, n_time, _read_dataset)
+    fl = h5.File(fname, mode='r')
+    try:
+        if time_range is None and index is None:
+            indx, n_time = None, None
+        else:
+            indx, n_time = _time_index(fl, time_range, index)
+
+        def read(dat, slc):
+            return _lazy_dataset(dat, slc, cache)
+
+        out = _load(fl, data_groups, indx, n_time, read)
+    except:
+        fl.close()
+        raise
+    return out
+
+
+def _time_index(buf, time_range=None, index=None):
+    """
+    Return the slice of time indices (and the length of the time
+    dimension) for the `time_range` or `index` of file `buf`.
+    """
+    if 'mpltime' not in buf:
+        raise ValueError("The file does not contain 'mpltime'.")
+    mpltime = buf['mpltime']
+    n_time = mpltime.shape[-1]
+    if time_range is not None:
+        if index is not None:
+            raise ValueError("Only one of `time_range` and `index` "
+                             "may be specified.")
+        i0, i1 = 0, n_time
+        if time_range[0] is not None:
+            i0 = _bisect(mpltime, time_range[0])
+        if time_range[1] is not None:
+            i1 = _bisect(mpltime, time_range[1])
+        return slice(i0, max(i0, i1)), n_time
+    if not isinstance(index, slice):
+        raise TypeError("`index` must be a slice.")
+    index = slice(*index.indices(n_time))
+    if index.step < 0:
+        raise ValueError("`index` must have a positive step.")
+    return index, n_time
+
+
+def _bisect(dset, val):
+    """
+    Find the index of the first value in the (sorted) 1-D dataset
+    `dset` that is >= `val`. This only reads ~log2(len(dset)) values
+    from the file.
     """
-    if is_pydicth5(fname):
-        return load_hdf5(fname, group=data_groups)
+    lo, hi = 0, dset.shape[-1]
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if dset[mid] < val:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def _load(buf, data_groups, indx, n_time, read):
+    """
+    Load the `data_groups` of `buf`, using the function `read` to
+    read each dataset (with the time index `indx`, or None).
+    """
+    if data_groups is None:
+        return _load_group(buf, indx, n_time, read)
+    if isinstance(data_groups, string_types):
+        if data_groups == '':
+            return _load_group(buf, indx, n_time, read, subgroups=False)
+        return _load_group(buf[data_groups], indx, n_time, read)
+    if '' in data_groups:
+        # As in pyDictH5's `load_hdf5`, '' is the datasets of the root
+        # group, loaded into the root's class.
+        out = _load_group(buf, indx, n_time, read, subgroups=False)
     else:
-        return legacy.load(fname, data_groups)
+        out = SourceDataType()
+    for grp in data_groups:
+        if grp != '':
+            out[grp] = _load_group(buf[grp], indx, n_time, read)
+    return out
+
+
+def _load_class(pklstr):
+    for cls_pklstr in cls_pklstr_gen(pklstr):
+        try:
+            return pdh_pkl.loads(cls_pklstr)
+        except ImportError:
+            pass
+    print("Warning: Class '{}' not found, defaulting to "
+          "generic 'pyDictH5.data'.".format(pklstr))
+    return SourceDataType
+
+
+def _load_group(buf, indx, n_time, read, subgroups=True):
+    out = _load_class(buf.attrs['__pyclass__'])()
+    time_dim = getattr(out, '_time_dim', None)
+    for nm in buf.keys():
+        dat = buf[nm]
+        if isinstance(dat, h5.Group):
+            if not subgroups:
+                continue
+            val = _load_group(dat, indx, n_time, read)
+        else:
+            dim = dat.attrs.get('_time_dim', None)
+            if (dim is None and time_dim is not None and
+                    dat.attrs.get('_type', None) is None and
+                    dat.ndim >= -time_dim and
+                    dat.shape[time_dim] == n_time):
+                dim = time_dim
+            if dim is None or indx is None:
+                val = read(dat, None)
+            else:
+                slc = [slice(None)] * dat.ndim
+                slc[dim] = indx
+                val = read(dat, tuple(slc))
+        dict.__setitem__(out, nm, val)
+    return out
+
+
+def _lazy_dataset(dat, slc=None, cache=True):
+    """
+    Return a :class:`LazyArray` proxy for numeric datasets, and read
+    all other datasets.
+    """
+    if (dat.attrs.get('_type', None) is not None or dat.ndim == 0 or
+            dat.dtype.kind not in 'biufc'):
+        return _read_dataset(dat, slc)
+    cls = dat.attrs.get('__pyclass__', None)
+    if cls is not None:
+        cls = pdh_pkl.loads(cls)
+    return LazyArray(dat, slc, view=cls, cache=cache)
+
+
+def _read_dataset(dat, slc=None):
+    """
+    Read the dataset `dat` (a hyperslab of it, if `slc` is not None),
+    and decode it the same way that pyDictH5's `load_hdf5` does.
+    """
+    type_str = pdh_pkl.decode(dat.attrs.get('_type', None))
+    cls = dat.attrs.get('__pyclass__', None)
+    if type_str == 'pickled object':
+        return pdh_pkl.loads(dat[()])
+    elif type_str == 'non-array scalar':
+        return pdh_pkl.decode(dat[()])
+    elif dat.dtype == 'O' and type_str == 'NumPy Object Array':
+        out = np.empty(dat.shape, dtype='O')
+        for idf in range(dat.size):
+            ida = np.unravel_index(idf, dat.shape)
+            tmp = dat[ida]
+            if tmp == '':
+                out[ida] = None
+            else:
+                try:
+                    out[ida] = pdh_pkl.loads(tmp)
+                except:
+                    out[ida] = tmp
+        if slc is not None:
+            out = out[slc]
+    elif slc is None:
+        out = np.array(dat)
+    else:
+        out = dat[slc]
+    if isinstance(type_str, string_types) and \
+       type_str.startswith('datetime64'):
+        out = out.astype(type_str)
+    if cls is not None:
+        cls = pdh_pkl.loads(cls)
+        if cls is not np.ndarray:
+            out = out.view(cls)
+    if out.dtype.name.startswith('bytes'):
+        out = out.astype('<U')
+    return out
 
 
 def is_pydicth5(fname):
@@ -59,3 +274,106 @@ def is_pydicth5(fname):
         retval = True
     fd.close()
     return retval
+
+
+def save(buf, dat, chunks=4096, compression='gzip', compression_opts=None,
+         shuffle=True):
+    """
+    Write a data object to an hdf5 file, with the datasets chunked
+    along the time dimension.
+
+    The file is a pyDictH5 file, so it can be read with :func:`load`
+    (or `pyDictH5.load_hdf5`).
+
+    Parameters
+    ----------
+
+    buf : string or h5py.Group
+      The filename (or open h5py file/group) to write to.
+
+    dat : :class:`dolfyn.data.base.data`
+      The data object to write.
+
+    chunks : int or True
+      The length of the chunks along the time dimension. Datasets
+      that do not have a time dimension, and all datasets if this
+      is ``True``, are chunked automatically by h5py.
+
+    compression : {'gzip', 'lzf', None}
+      The compression filter.
+
+    compression_opts : int
+      The compression level (0-9) for 'gzip' compression.
+
+    shuffle : bool
+      Whether to apply the shuffle filter (this usually improves
+      compression).
+
+    Notes
+    -----
+    The chunking is recorded in the 'chunk_time', 'compression' and
+    'shuffle' attributes of the file. Datasets that are chunked along
+    the time dimension have a '_time_dim' attribute that indicates
+    which dimension that is.
+    """
+    if isinstance(buf, string_types):
+        with h5.File(buf, 'w') as fl:
+            fl.attrs['__package_name__'] = pdh_ver.__package__
+            fl.attrs['__version__'] = pdh_ver.__version__
+            fl.attrs['chunk_time'] = 0 if chunks is True else chunks
+            fl.attrs['compression'] = str(compression)
+            fl.attrs['shuffle'] = shuffle
+            save(fl, dat, chunks=chunks, compression=compression,
+                 compression_opts=compression_opts, shuffle=shuffle)
+        return
+    n_time = None
+    if 'mpltime' in dat:
+        n_time = len(dat['mpltime'])
+    _save_group(buf, dat, n_time,
+                dict(chunks=chunks, compression=compression,
+                     compression_opts=compression_opts, shuffle=shuffle))
+
+
+def _save_group(buf, dat, n_time, opts):
+    """
+    Write the data group `dat` to the h5py group `buf`.
+
+    Numeric arrays and sub-groups are written here. Everything else
+    is passed to pyDictH5's `hdf5_write`.
+    """
+    time_dim = getattr(dat, '_time_dim', None)
+    rest = dat.__class__()
+    for nm in dat.keys():
+        val = dat[nm]
+        if isinstance(val, SourceDataType):
+            _save_group(buf.create_group(nm), val, n_time, opts)
+        elif isinstance(val, np.ndarray) and val.dtype.kind in 'biufc':
+            ds = _create_dataset(buf, nm, val, time_dim, n_time, opts)
+            ds.attrs['__pyclass__'] = pdh_pkl.dumps(type(val))
+        else:
+            dict.__setitem__(rest, nm, val)
+    # This also sets the '__pyclass__' attribute of this group.
+    hdf5_write(buf, rest, compression=opts['compression'])
+
+
+def _create_dataset(buf, name, arr, time_dim, n_time, opts):
+    kwargs = {}
+    if arr.ndim > 0 and arr.size > 0:
+        if (opts['chunks'] is not True and time_dim is not None and
+                arr.ndim >= -time_dim and arr.shape[time_dim] == n_time):
+            chunks = list(arr.shape)
+            chunks[time_dim] = min(opts['chunks'], n_time)
+            kwargs['chunks'] = tuple(chunks)
+        else:
+            time_dim = None
+            kwargs['chunks'] = True
+        kwargs['compression'] = opts['compression']
+        kwargs['shuffle'] = opts['shuffle']
+        if opts['compression'] == 'gzip':
+            kwargs['compression_opts'] = opts['compression_opts']
+    else:
+        time_dim = None
+    ds = buf.create_dataset(name, data=arr, **kwargs)
+    if time_dim is not None:
+        ds.attrs['_time_dim'] = time_dim
+    return ds
@@ -1,6 +1,21 @@
-from scipy import io as spio
+"""
+Write data objects to Matlab(TM) (.mat) files.
+
+:func:`save_mat` writes MAT-file version 7.3 files (these are HDF5
+files, so they are not limited to 2 GB per variable). The arrays are
+written to disk in chunks along the time dimension, so that large
+data objects can be saved without copying them in memory.
+"""
+from __future__ import division
 from .base import DataFactory
+from ..data.base import LazyArray
 import copy
+import platform
+import re
+import time
+import warnings
+import numpy as np
+import six
 try:
     # Python 2
     ucode_type = unicode
@@ -69,6 +84,7 @@ class Saver(DataFactory):
           (None), it writes all groups.
 
         """
+        from scipy import io as spio
         out = self._obj2todict(obj, groups=groups)
         if hasattr(obj, '_pre_mat_save'):
             obj._pre_mat_save(out)
@@ -77,3 +93,212 @@ class Saver(DataFactory):
                      format=self.format,
                      do_compression=self.do_compression,
                      oned_as=self.oned_as)
+
+
+# The MATLAB_class names of numpy dtypes.
+_mat_class = {'f8': 'double', 'f4': 'single',
+              'i1': 'int8', 'i2': 'int16', 'i4': 'int32', 'i8': 'int64',
+              'u1': 'uint8', 'u2': 'uint16', 'u4': 'uint32', 'u8': 'uint64',
+              'b1': 'logical', 'c16': 'double', 'c8': 'single', }
+
+
+def _mat_header():
+    """The 128-byte MAT-file header that goes in the HDF5 userblock.
+    """
+    txt = ('MATLAB 7.3 MAT-file, Platform: {} {}, Created on: {} '
+           'HDF5 schema 1.00 .'.format(platform.system(), platform.machine(),
+                                       time.strftime('%a %b %d %H:%M:%S %Y')))
+    return (txt.ljust(116).encode('ascii') + b'\x00' * 8 +
+            b'\x00\x02' + b'IM')
+
+
+def _mat_name(name):
+    """Convert `name` to a valid MATLAB variable/field name.
+    """
+    name = re.sub(r'\W', '_', name)
+    if not re.match('[A-Za-z]', name):
+        name = 'x' + name
+    return name[:63]
+
+
+def _to_array(val):
+    """
+    Convert non-array values (scalars, strings, lists, sets) to
+    arrays. Returns None for values that can not be converted.
+    """
+    if isinstance(val, set):
+        val = sorted(val)
+    if val is None:
+        return np.zeros((0, 0))
+    try:
+        arr = np.asarray(val)
+    except Exception:
+        return None
+    if arr.dtype.kind == 'S':
+        arr = arr.astype('U')
+    if arr.dtype.kind == 'O':
+        try:
+            arr = arr.astype('U')
+        except Exception:
+            return None
+    if arr.dtype.str[1:] not in _mat_class and arr.dtype.kind != 'U':
+        return None
+    return arr
+
+
+def _write_attrs(ds, mat_class, **kwargs):
+    ds.attrs['MATLAB_class'] = np.bytes_(mat_class)
+    for ky, val in six.iteritems(kwargs):
+        ds.attrs[ky] = val
+
+
+def _write_char(buf, name, arr):
+    # MATLAB stores strings as uint16 character codes, and string
+    # arrays as 2-D character arrays (one row per string).
+    if arr.size == 0 or (arr.size == 1 and not arr.reshape(-1)[0]):
+        ds = buf.create_dataset(name, data=np.array([0, 0], dtype=np.uint64))
+        _write_attrs(ds, 'char', MATLAB_int_decode=np.int32(2),
+                     MATLAB_empty=np.uint8(1))
+        return
+    arr = np.atleast_1d(arr)
+    width = arr.dtype.itemsize // 4
+    codes = (np.ascontiguousarray(arr.reshape(-1)).view(np.uint32)
+             .reshape(-1, width).astype(np.uint16))
+    # Pad the rows with spaces.
+    codes[codes == 0] = 32
+    ds = buf.create_dataset(name, data=np.ascontiguousarray(codes.T))
+    _write_attrs(ds, 'char', MATLAB_int_decode=np.int32(2))
+
+
+def _write_array(buf, name, arr, time_dim, chunks, compression):
+    """
+    Write the array `arr` to the MATLAB variable `name`. The data is
+    written in slabs of length `chunks` along `time_dim`.
+    """
+    if arr.dtype.kind == 'U':
+        return _write_char(buf, name, arr)
+    mat_class = _mat_class[arr.dtype.str[1:]]
+    if arr.size == 0:
+        ds = buf.create_dataset(name, data=np.array(arr.shape or (0, 0),
+                                                    dtype=np.uint64))
+        _write_attrs(ds, mat_class, MATLAB_empty=np.uint8(1))
+        return
+    if arr.ndim < 2:
+        # MATLAB arrays are at least 2-D (1-D arrays are rows).
+        arr = arr.reshape(1, -1)
+    dtype = arr.dtype
+    if dtype.kind == 'b':
+        dtype = np.dtype(np.uint8)
+    elif dtype.kind == 'c':
+        flt = np.dtype('f{}'.format(dtype.itemsize // 2))
+        dtype = np.dtype([('real', flt), ('imag', flt)])
+    # MATLAB arrays are column-major, so the HDF5 dataset has the
+    # dimensions in reverse order.
+    shape = arr.shape[::-1]
+    if time_dim is None or arr.ndim < -time_dim:
+        time_dim = -1
+    h5dim = arr.ndim - 1 - (time_dim % arr.ndim)
+    n_time = arr.shape[time_dim]
+    chunk_shape = None
+    if chunks and n_time > chunks:
+        chunk_shape = list(shape)
+        chunk_shape[h5dim] = chunks
+        chunk_shape = tuple(chunk_shape)
+    ds = buf.create_dataset(name, shape=shape, dtype=dtype,
+                            chunks=chunk_shape, compression=compression)
+    step = chunks or n_time
+    slc_arr = [slice(None)] * arr.ndim
+    slc_ds = [slice(None)] * arr.ndim
+    for i0 in range(0, n_time, step):
+        slc_arr[time_dim] = slc_ds[h5dim] = slice(i0, i0 + step)
+        tmp = np.asarray(arr[tuple(slc_arr)]).T
+        if dtype.kind == 'V':
+            tmp2 = np.empty(tmp.shape, dtype=dtype)
+            tmp2['real'] = tmp.real
+            tmp2['imag'] = tmp.imag
+            tmp = tmp2
+        ds[tuple(slc_ds)] = tmp
+    if arr.dtype.kind == 'b':
+        _write_attrs(ds, mat_class, MATLAB_int_decode=np.int32(1))
+    else:
+        _write_attrs(ds, mat_class)
+
+
+def _write_struct(buf, dat, chunks, compression, skip=[]):
+    _write_attrs(buf, 'struct')
+    time_dim = getattr(dat, '_time_dim', None)
+    for nm in dat:
+        if nm in skip:
+            continue
+        val = dict.__getitem__(dat, nm)
+        if isinstance(val, LazyArray) and val.ndim < 2:
+            val = val.load()
+        name = _mat_name(nm)
+        if name in buf:
+            warnings.warn("Skipping '{}': the name '{}' already exists."
+                          .format(nm, name))
+            continue
+        if isinstance(val, dict):
+            _write_struct(buf.create_group(name), val, chunks, compression)
+            continue
+        if (isinstance(val, (np.ndarray, LazyArray)) and
+                val.dtype.kind != 'O'):
+            # Lazy arrays are read one chunk at a time.
+            arr = val
+        else:
+            arr = _to_array(val)
+        if arr is None:
+            warnings.warn("Skipping '{}': {} can not be written to a "
+                          "MAT-file.".format(nm, type(val)))
+            continue
+        _write_array(buf, name, arr, time_dim, chunks, compression)
+
+
+def save_mat(fname, dat, groups=None, datenum=True, chunks=4096,
+             compression=None):
+    """
+    Write a data object to a Matlab(TM) (version 7.3) MAT-file.
+
+    Parameters
+    ----------
+    fname : string
+      The filename to write.
+    dat : :class:`dolfyn.data.base.data`
+      The data object to write. Each data group is written as a
+      MATLAB struct.
+    groups : list of strings
+      The data groups to write (default: all of them). The arrays at
+      the top level of `dat` are always written.
+    datenum : bool
+      Whether to add a 'datenum' variable (MATLAB datenum time,
+      computed from `mpltime`).
+    chunks : int
+      The arrays are written in chunks of this many time steps.
+    compression : {None, 'gzip', 'lzf'}
+      The compression filter (MATLAB supports None and 'gzip').
+
+    Notes
+    -----
+    The data is written to disk one chunk at a time, so there is no
+    limit on the size of the variables, and the arrays are not copied
+    in memory. MATLAB reads these files with `load`, or `matfile` (for
+    partial reads).
+    """
+    import h5py
+    if groups is None:
+        skip = []
+    else:
+        if isinstance(groups, six.string_types):
+            groups = [groups]
+        skip = [ky for ky in dat if isinstance(dict.__getitem__(dat, ky),
+                                               dict) and ky not in groups]
+    with h5py.File(fname, 'w', userblock_size=512) as fl:
+        _write_struct(fl, dat, chunks, compression, skip=skip)
+        del fl.attrs['MATLAB_class']
+        if datenum and 'mpltime' in dat and 'datenum' not in dat:
+            from ..data.time import mpltime2matlab_datenum
+            _write_array(fl, 'datenum',
+                         mpltime2matlab_datenum(np.asarray(dat['mpltime'])),
+                         -1, chunks, compression)
+    with open(fname, 'r+b') as fl:
+        fl.write(_mat_header())
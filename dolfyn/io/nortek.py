@@ -116,7 +116,7 @@ def read_nortek(filename,
                 inds = ((tr[0] < dat.mpltime) & (dat.mpltime < tr[1]))
             else:
                 raise KeyError(cropdata)
-        dat = dat.subset(inds)
+        dat = dat.subset[inds]
     return dat
 
 
@@ -1,23 +1,77 @@
 #import scipy.io as io
 from __future__ import print_function
 import numpy as np
-import datetime
-from ..data.time import date2num
+from ..data.time import ymdhms2num
 from ..data.base import config, TimeData as data
 from os.path import getsize
 from ..adp.base import adcp_raw
 from .base import WrongFileType
 from ._read_bin import eofException, bin_reader
-from scipy import nanmean
 import warnings
-
-
-def read_rdi(fname, userdata=None, nens=None):
+import multiprocessing
+
+
+def read_rdi(fname, userdata=None, nens=None, workers=None):
+    """Read an RDI binary data file.
+
+    Parameters
+    ----------
+    fname : string
+      The filename of the file to load.
+    userdata : None
+      This is not used for RDI files.
+    nens : None (default: read entire file), int, or 2-element tuple
+      The number of ensembles to read, or the (start, stop) range of
+      ensembles to read.
+    workers : None (default: 1), or int
+      The number of processes to decode the file with. When this is
+      greater than 1, the ensemble start positions are indexed first,
+      and contiguous ranges of ensembles are decoded in parallel.
+
+    Returns
+    -------
+    dat : :class:`dolfyn.adp.base.adcp_raw` object
+      The ADCP data object.
+    """
     # userdata is not used here.
     with adcp_loader(fname) as ldr:
-        dat = ldr.load_data(nens=nens)
+        dat = ldr.load_data(nens=nens, workers=workers)
     return dat
 
+
+def _load_ens_range(args):
+    """Decode `nens` ensembles of file `fname` starting at byte
+    position `pos`.
+
+    This is the worker function for parallel reads. If `warmup` is
+    True, one ensemble is read (and discarded) before the range, so
+    that the reader state (e.g., the data source) matches that of a
+    sequential read.
+
+    Returns
+    -------
+    nread : int
+      The number of ensembles that were read.
+    vars_read : set
+      The names of the variables that were read.
+    cfg : dict
+      The configuration data.
+    arrays : dict
+      The data arrays (indexed by variable name).
+    """
+    fname, pos, nens, navg, warmup = args
+    with adcp_loader(fname, navg=navg, debug_level=-1) as ldr:
+        ldr.f.seek(pos, 0)
+        if warmup:
+            ldr.read_buffer()
+        ldr._nens = nens
+        ldr.init_data()
+        nread = ldr._read_ensembles()
+        vars_read = set(ldr.vars_read)
+        arrays = dict((nm, get(ldr.outd, nm)[..., :nread])
+                      for nm in vars_read)
+        return nread, vars_read, dict(ldr.cfg), arrays
+
 # Four pound symbols ("####"), indicate a duplication of a comment from
 # Rich Pawlawicz' rdadcp routines.
 
@@ -77,6 +131,60 @@ data_defs = {'number': ([], 'sys', 'uint32'),
              }
 
 
+# The binary layouts of the navigation blocks. These are stored as raw
+# records while the file is scanned, and decoded all at once afterward
+# (see adcp_loader._parse_nav).
+#
+# The WinRiver II GPGGA block (0x2022, following the spid and size):
+nav_gga_dtype = np.dtype([('dtime', '<f8'),
+                          ('header', 'S6'),
+                          ('_sep0', 'S1'),
+                          ('gtime', 'S9'),
+                          ('_sep1', 'S1'),
+                          ('lat', '<f8'),
+                          ('NS', 'S1'),
+                          ('lon', '<f8'),
+                          ('EW', 'S1'),
+                          ('qual', 'u1'),
+                          ('n_sat', 'u1'),
+                          ('hdop', '<f4'),
+                          ('altitude', '<f4'),
+                          ('M0', 'S1'),
+                          ('geoid_sep', '<f4'),
+                          ('M1', 'S1'),
+                          ('age', '<f4'),
+                          ('station_id', '<u2'), ])
+# The VMDAS navigation block (0x2000):
+nav_vmdas_dtype = np.dtype([('sdate', 'u1', 4),
+                            ('stime', '<u4'),
+                            ('pc_clock_offset', '<i4'),
+                            ('slatitude', '<i4'),
+                            ('slongitude', '<i4'),
+                            ('etime', '<u4'),
+                            ('elatitude', '<i4'),
+                            ('elongitude', '<i4'),
+                            ('_spare0', 'V12'),
+                            ('flags', '<u2'),
+                            ('_spare1', 'V6'),
+                            ('ndate', 'u1', 4),
+                            ('ntime', '<u4'),
+                            ('_spare2', 'V16'), ])
+
+
+def _hundredths2num(date, hundredths):
+    """
+    Add a time in hundredths of seconds to `date` (mpltime of the
+    start of the day). This matches
+    ``date2num(datetime(...) + timedelta(milliseconds=hundredths*10))``.
+    """
+    ms = np.asarray(hundredths, dtype=np.int64) * 10
+    days, ms = np.divmod(ms, 86400000)
+    hr, ms = np.divmod(ms, 3600000)
+    mn, ms = np.divmod(ms, 60000)
+    sec, ms = np.divmod(ms, 1000)
+    return (date + days) + (((ms * 1000 / 1e6 + sec) / 60 + mn) / 60 + hr) / 24
+
+
 # These are shortcut functions (so that I don't have to do this `if
 # grp` over and over)
 def get(dat, nm):
@@ -178,6 +286,7 @@ class adcp_loader(object):
     _winrivprob = False
     _search_num = 30000  # Maximum distance? to search
     _debug7f79 = None
+    _nav = None
     vars_read = variable_setlist(['mpltime'])
 
     def _debug_print(self, lvl, msg):
@@ -188,7 +297,7 @@ class adcp_loader(object):
         if self.n_avg == 1:
             return dat[..., 0]
         if np.isnan(dat).any():
-            return nanmean(dat, axis=-1)
+            return np.nanmean(dat, axis=-1)
         return np.mean(dat, axis=-1)
 
     def print_progress(self,):
@@ -488,8 +597,6 @@ class adcp_loader(object):
         # The raw files produced by VMDAS contain a binary navigation data
         # block.
         self.cfg['sourceprog'] = 'VMDAS'
-        ens = self.ensemble
-        k = ens.k
         if self._source != 1 and self._debug_level >= 1:
             print('  \n***** Apparently a VMDAS file \n\n')
         self._source = 1
@@ -501,34 +608,13 @@ class adcp_loader(object):
                            'elongitude',
                            'flags',
                            'ntime', ]
-        utim = fd.read_ui8(4)
-        date = datetime.datetime(utim[2] + utim[3] * 256, utim[1], utim[0])
-        # This byte is in hundredths of seconds (10s of milliseconds):
-        time = datetime.timedelta(milliseconds=(int(fd.read_ui32(1)[0] * 10)))
-        ens.stime[k] = date2num(date + time) + time_offset
-        fd.seek(4, 1)  # "PC clock offset from UTC"
-        ens.slatitude[k] = fd.read_i32(1) * self._cfac
-        ens.slatitude[k] = fd.read_ui32(1) * self._cfac
-        ens.etime[k] = date2num(date + datetime.timedelta(
-            milliseconds=int(fd.read_ui32(1)[0] * 10))) + time_offset
-        ens.elatitude[k] = fd.read_i32(1) * self._cfac
-        ens.elongitude[k] = fd.read_i32(1) * self._cfac
-        fd.seek(12, 1)
-        ens.flags[k] = fd.read_ui16(1)
-        fd.seek(6, 1)
-        utim = fd.read_ui8(4)
-        date = datetime.datetime(utim[0] + utim[1] * 256, utim[3], utim[2])
-        ens.ntime[k] = date2num(date + datetime.timedelta(
-            milliseconds=int(fd.read_ui32(1)[0] * 10))) + time_offset
-        fd.seek(16, 1)
+        self._store_nav('vmdas', fd.read_nbytes(nav_vmdas_dtype.itemsize))
         self._nbyte = 2 + 76
 
     def read_winriver2(self, ):
         startpos = self.f.tell()
         self._winrivprob = True
         self.cfg['sourceprog'] = 'WINRIVER'
-        ens = self.ensemble
-        k = ens.k
         if self._source != 3 and self._debug_level >= 1:
             print('  \n***** Apparently a WINRIVER2 file\n'
                   '*****    WARNING: Raw NMEA data '
@@ -537,66 +623,18 @@ class adcp_loader(object):
         spid = self.f.read_ui16(1)
         if spid == 104:
             sz = self.f.read_ui16(1)
-            dtime = self.f.read_f64(1)
-            start_string = self.f.reads(6)
-            _ = self.f.reads(1)
-            if start_string != '$GPGGA':
-                if self._debug_level > 1:
-                    print(
-                        '  WARNING: Invalid GPGGA string found in ensemble {},'
-                        ' skipping...'.format(k))
-                return 'FAIL'
-            ens.gtime[k] = self.f.reads(9)
-            self.f.seek(1, 1)
-            ens.glatitude[k] = self.f.read_f64(1)
-            tcNS = self.f.reads(1)
-            if tcNS == 'S':
-                ens.glatitude[k] *= -1
-            elif tcNS != 'N':
-                if self._debug_level > 1:
-                    print(
-                        '  WARNING: Invalid GPGGA string found in ensemble {},'
-                        ' skipping...'.format(k))
-                return 'FAIL'
-            ens.glongitude[k] = self.f.read_f64(1)
-            tcEW = self.f.reads(1)
-            if tcEW == 'W':
-                ens.glongitude[k] *= -1
-            elif tcEW != 'E':
-                if self._debug_level > 1:
-                    print(
-                        '  WARNING: Invalid GPGGA string found in ensemble {},'
-                        ' skipping...'.format(k))
-                return 'FAIL'
-            ucqual, n_sat = self.f.read_ui8(2)
-            tmp = self.f.read_float(2)
-            ens.hdop, ens.altitude = tmp
-            if self.f.reads(1) != 'M':
-                if self._debug_level > 1:
-                    print(
-                        '  WARNING: Invalid GPGGA string found in ensemble {},'
-                        ' skipping...'.format(k))
-                return 'FAIL'
-            ggeoid_sep = self.f.read_float(1)
-            if self.f.reads(1) != 'M':
-                if self._debug_level > 1:
-                    print(
-                        '  WARNING: Invalid GPGGA string found in ensemble {},'
-                        ' skipping...'.format(k))
-                return 'FAIL'
-            gage = self.f.read_float(1)
-            gstation_id = self.f.read_ui16(1)
             # ## For some reason this was only on the first block that
             # ## I was looking at.
             # I believe these like the following:
             # 4 unknown bytes (2 reserved+2 checksum?)
             # 78 bytes for GPGGA string (including \r\n)
             # 2 reserved + 2 checksum
+            self._store_nav('gga', self.f.read_nbytes(nav_gga_dtype.itemsize))
             self.vars_read += ['glongitude', 'glatitude', 'gtime']
             self._nbyte = self.f.tell() - startpos + 2
             if self._debug_level >= 5:
                 print('')
-                print(sz, ens.glongitude[k])
+                print(sz)
 
     def read_winriver(self, nbt):
         self._winrivprob = True
@@ -608,9 +646,76 @@ class adcp_loader(object):
             self._source = 2
         startpos = self.f.tell()
         sz = self.f.read_ui16(1)
-        tmp = self.f.reads(sz)
+        # The raw NMEA strings are not decoded, so skip them.
+        self.f.seek(sz, 1)
         self._nbyte = self.f.tell() - startpos + 2
 
+    def _store_nav(self, name, raw):
+        """
+        Store the `raw` bytes of navigation block `name` for the
+        current ping. These are decoded in `_parse_nav`.
+        """
+        if self._nav is None:
+            # Not reading into self.outd (e.g., a warm-up read).
+            return
+        if name not in self._nav:
+            dtype = {'gga': nav_gga_dtype, 'vmdas': nav_vmdas_dtype}[name]
+            self._nav[name] = (
+                np.zeros((self._nens, self.ensemble.n_avg), dtype=dtype),
+                np.zeros((self._nens, self.ensemble.n_avg), dtype=np.bool_))
+        recs, present = self._nav[name]
+        recs[self._iens, self.ensemble.k] = np.frombuffer(raw, recs.dtype)[0]
+        present[self._iens, self.ensemble.k] = True
+
+    def _parse_nav(self, nread):
+        """
+        Decode the navigation blocks of the first `nread` ensembles,
+        and average them into self.outd.
+        """
+        dat = self.outd
+        out = {}
+        if 'gga' in self._nav:
+            recs, present = self._nav['gga']
+            recs, present = recs[:nread], present[:nread]
+            valid = (present &
+                     (recs['header'] == b'$GPGGA') &
+                     np.in1d(recs['NS'], [b'N', b'S']).reshape(recs.shape) &
+                     np.in1d(recs['EW'], [b'E', b'W']).reshape(recs.shape) &
+                     (recs['M0'] == b'M') & (recs['M1'] == b'M'))
+            if self._debug_level > 1 and (present & ~valid).any():
+                print('  WARNING: Invalid GPGGA strings found in ensembles {}'
+                      .format(np.nonzero((present & ~valid).any(-1))[0]))
+            out['glatitude'] = np.where(recs['NS'] == b'S',
+                                        -recs['lat'], recs['lat'])
+            out['glongitude'] = np.where(recs['EW'] == b'W',
+                                         -recs['lon'], recs['lon'])
+            for nm in ['glatitude', 'glongitude']:
+                out[nm][~valid] = np.NaN
+            gtime = recs['gtime'].astype(data_defs['gtime'][2])
+            gtime[~valid] = ''
+            # Strings can't be averaged, so use the first ping.
+            get(dat, 'gtime')[:nread] = gtime[:, 0]
+        if 'vmdas' in self._nav:
+            recs, present = self._nav['vmdas']
+            recs, present = recs[:nread], present[:nread]
+            utim = recs['sdate'].astype(np.int64)
+            date = ymdhms2num(utim[..., 2] + utim[..., 3] * 256,
+                              utim[..., 1], utim[..., 0])
+            out['stime'] = _hundredths2num(date, recs['stime']) + time_offset
+            out['etime'] = _hundredths2num(date, recs['etime']) + time_offset
+            utim = recs['ndate'].astype(np.int64)
+            date = ymdhms2num(utim[..., 0] + utim[..., 1] * 256,
+                              utim[..., 3], utim[..., 2])
+            out['ntime'] = _hundredths2num(date, recs['ntime']) + time_offset
+            for nm in ['slatitude', 'slongitude', 'elatitude', 'elongitude']:
+                out[nm] = recs[nm] * self._cfac
+            out['flags'] = recs['flags'].astype(np.float64)
+            for nm in ['stime', 'etime', 'ntime', 'slatitude', 'slongitude',
+                       'elatitude', 'elongitude', 'flags']:
+                out[nm][~present] = np.NaN
+        for nm in out:
+            get(dat, nm)[..., :nread] = self.avg_func(out[nm])
+
     def skip_Ncol(self, n_skip=1):
         self.f.seek(n_skip * self.cfg['n_cells'], 1)
         self._nbyte = 2 + n_skip * self.cfg['n_cells']
@@ -752,7 +857,8 @@ class adcp_loader(object):
 
     def __init__(self, fname, navg=1, avg_func='mean', debug_level=0):
         self.fname = fname
-        print('\nReading file {} ...'.format(fname))
+        if debug_level >= 0:
+            print('\nReading file {} ...'.format(fname))
         self._debug_level = debug_level
         self.cfg = config(_type='ADCP')
         self.cfg['name'] = 'wh-adcp'
@@ -789,7 +895,7 @@ class adcp_loader(object):
                               self.cfg['n_cells']))
         self.outd = outd
 
-    def load_data(self, nens=None):
+    def load_data(self, nens=None, workers=None):
         if nens is None:
             self._nens = int(self._npings / self.n_avg)
             self._ens_range = (0, self._nens)
@@ -816,29 +922,120 @@ class adcp_loader(object):
         dat['config'] = self.cfg
         if self.cfg['orientation'] == 1:
             dat['range'] *= -1
+        if workers is not None and workers > 1:
+            self._read_parallel(workers)
+        else:
+            self._read_ensembles()
+        self.finalize()
+        return dat
+
+    def _read_ensembles(self, ):
+        """
+        Read (up to) self._nens ensembles, starting at the current file
+        position, into self.outd.
+
+        Returns the number of ensembles that were read.
+        """
+        dat = self.outd
+        ens = self.ensemble
+        # The raw clock fields of every ping (converted to mpltime below)
+        rtc = np.empty((7, ens.n_avg, self._nens), dtype=np.uint16)
+        self._nav = {}
+        nread = self._nens
         for iens in range(self._nens):
+            self._iens = iens
             try:
                 self.read_buffer()
             except eofException:
-                self.remove_end(iens)
-                self.finalize()
-                return dat
-            self.ensemble.clean_data()
-            if self.ensemble.rtc[0, 0] < 100:
-                self.ensemble.rtc[0, :] += century
-            dats = date2num(datetime.datetime(self.ensemble.rtc[0, :],
-                                              self.ensemble.rtc[1, :],
-                                              self.ensemble.rtc[2, :],
-                                              self.ensemble.rtc[3, :],
-                                              self.ensemble.rtc[4, :],
-                                              self.ensemble.rtc[5, :],
-                                              1e4 * self.ensemble.rtc[6, :]))
+                nread = iens
+                break
+            ens.clean_data()
+            if ens.rtc[0, 0] < 100:
+                ens.rtc[0, :] += century
+            rtc[..., iens] = ens.rtc
             #print( self.ensemble.bt_range )
             for nm in self.vars_read:
-                get(dat, nm)[..., iens] = self.avg_func(self.ensemble[nm])
-            dat['mpltime'][iens] = np.median(dats)
-        self.finalize()
-        return dat
+                get(dat, nm)[..., iens] = self.avg_func(ens[nm])
+        rtc = rtc[..., :nread].astype(np.int64)
+        dats = ymdhms2num(rtc[0], rtc[1], rtc[2], rtc[3], rtc[4], rtc[5],
+                          1e4 * rtc[6])
+        dat['mpltime'][:nread] = np.median(dats, axis=0)
+        self._parse_nav(nread)
+        self._nav = None
+        if nread < self._nens:
+            self.remove_end(nread)
+        return nread
+
+    def _read_parallel(self, workers):
+        """
+        Read the data by decoding contiguous ranges of ensembles in
+        `workers` separate processes.
+
+        The arrays decoded by each process are copied into the
+        (preallocated) self.outd.
+        """
+        dat = self.outd
+        pos = self.index_ensembles(self._nens * self.n_avg)
+        n_ens = min(self._nens, len(pos) // self.n_avg)
+        jobs = []
+        for inds in np.array_split(np.arange(n_ens), workers):
+            if not len(inds):
+                continue
+            i0 = inds[0] * self.n_avg
+            warmup = i0 > 0
+            if warmup:
+                i0 -= self.n_avg
+            jobs.append((self.fname, pos[i0], len(inds), self.n_avg, warmup))
+        pool = multiprocessing.Pool(min(workers, len(jobs)))
+        try:
+            results = pool.map(_load_ens_range, jobs)
+        finally:
+            pool.close()
+            pool.join()
+        iens = 0
+        for nread, vars_read, cfg, arrays in results:
+            self.vars_read |= vars_read
+            self.cfg.update(cfg)
+            for nm in arrays:
+                get(dat, nm)[..., iens:iens + nread] = arrays[nm]
+            iens += nread
+        self.remove_end(iens)
+        return iens
+
+    def index_ensembles(self, npings=None):
+        """
+        Find the file positions of the pings (ensemble headers),
+        starting at the current file position.
+
+        Parameters
+        ----------
+        npings : int (optional)
+          Stop after this many pings have been found.
+
+        Returns
+        -------
+        pos : |np.ndarray| (int64)
+          The file positions of the start of each ping.
+
+        Notes
+        -----
+        This only reads the header of each ping, and uses the number
+        of bytes it contains to jump to the next one. The file position
+        is restored when this is done.
+        """
+        fd = self.f
+        start = fd.tell()
+        pos = []
+        try:
+            while npings is None or len(pos) < npings:
+                self.search_buffer()
+                pos.append(fd.tell() - 2)
+                nbyte = fd.read_i16(1)
+                fd.seek(pos[-1] + nbyte + 2, 0)
+        except (eofException, WrongFileType):
+            pass
+        fd.seek(start, 0)
+        return np.array(pos, dtype=np.int64)
 
     def finalize(self, ):
         """
@@ -1,6 +1,6 @@
-import pkg_resources
 from .io.api import read
 from .io.hdf5 import load
+from .io.cache import load_cache
 
 
 def read_example(name):
@@ -25,6 +25,7 @@ def read_example(name):
     dat : ADV or ADP data object.
 
     """
+    import pkg_resources
     filename = pkg_resources.resource_filename(
         'dolfyn',
         'example_data/' + name)
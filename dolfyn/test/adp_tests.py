@@ -1,9 +1,16 @@
 import dolfyn.adp.api as apm
 try:
-    from .base import ResourceFilename
+    from .base import ResourceFilename, tmp_dir
 except ImportError:
-    from base import ResourceFilename
+    from base import ResourceFilename, tmp_dir
 from dolfyn.io.hdf5 import load
+from dolfyn.io.rdi import read_rdi
+from dolfyn.io.nortek import read_nortek
+from dolfyn.io.nortek2 import read_signature
+from dolfyn.io.api import sniff_reader, read, ReadCache
+import numpy as np
+import os
+import warnings
 import pyDictH5.base as pdh5_base
 
 rfnm = ResourceFilename('dolfyn.test')
@@ -24,6 +31,19 @@ def data_equiv(dat1, dat2, message=''):
     assert dat1 == dat2, message
 
 
+def assert_close(dat1, dat2, message='', *args):
+    assert np.allclose(dat1, dat2, *args, equal_nan=True), message
+
+
+def check_except(fn, args, errors=Exception, message=''):
+    try:
+        fn(args)
+    except errors:
+        pass
+    else:
+        raise Exception(message)
+
+
 def read_test(make_data=False):
 
     td_rdi = apm.read(exdt('example_data/RDI_test01.000'))
@@ -63,6 +83,169 @@ def read_test(make_data=False):
         yield data_equiv, dat1, dat2, msg
 
 
+def read_parallel_test():
+
+    td_rdi = read_rdi(exdt('example_data/RDI_test01.000'), workers=2)
+    td_wr2 = read_rdi(exdt('example_data/winriver02.PD0'), workers=3)
+
+    msg = "Parallel read of '{}' does not match the sequential read."
+    for dat1, dat2, msg in [
+            (td_rdi, dat_rdi, msg.format('RDI_test01.000')),
+            (td_wr2, dat_wr2, msg.format('winriver02.PD0')),
+    ]:
+        yield data_equiv, dat1, dat2, msg
+
+
+def rdi_nav_test():
+    from dolfyn.io import rdi
+    from dolfyn.data.time import date2num
+    from datetime import datetime, timedelta
+    hnds = [0, 1, 4523456, 8640005]
+    yield (data_equiv, rdi._hundredths2num(date2num(datetime(2015, 3, 4)),
+                                           hnds).tolist(),
+           [date2num(datetime(2015, 3, 4) + timedelta(milliseconds=hs * 10))
+            for hs in hnds],
+           "_hundredths2num does not match datetime + timedelta.")
+
+    # A loader for 2 ensembles of 2 pings, with the navigation fields
+    # of the output data (but no file).
+    ldr = rdi.adcp_loader.__new__(rdi.adcp_loader)
+    ldr._debug_level = 0
+    ldr._nens = 2
+    ldr.n_avg = 2
+    ldr.ensemble = rdi.ensemble(2, 1)
+    ldr.avg_func = ldr.mean
+    ldr.outd = dict(orient={}, sys={}, signal={})
+    for nm in ['gtime', 'glatitude', 'glongitude', 'stime', 'etime',
+               'ntime', 'slatitude', 'slongitude', 'elatitude',
+               'elongitude', 'flags']:
+        grp = rdi.data_defs[nm][1]
+        (ldr.outd if grp is None else ldr.outd[grp])[nm] = np.zeros(
+            2, dtype=rdi.data_defs[nm][2])
+    gga = np.zeros((), dtype=rdi.nav_gga_dtype)
+    gga['header'], gga['gtime'] = b'$GPGGA', b'123456.00'
+    gga['NS'], gga['EW'], gga['M0'], gga['M1'] = b'S', b'W', b'M', b'M'
+    vmdas = np.zeros((), dtype=rdi.nav_vmdas_dtype)
+    vmdas['sdate'] = [4, 3, 223, 7]  # day, month, year (2015)
+    vmdas['ndate'] = [223, 7, 4, 3]  # year, day, month
+    vmdas['stime'], vmdas['etime'], vmdas['ntime'] = 100, 200, 300
+    vmdas['slatitude'], vmdas['elongitude'] = 2 ** 29, -2 ** 30
+    vmdas['flags'] = 3
+    ldr._nav = {}
+    for iens in range(2):
+        ldr._iens = iens
+        for k in range(2):
+            ldr.ensemble.k = k
+            gga['lat'], gga['lon'] = 45 + iens + k, 120 + iens
+            if (iens, k) == (1, 1):
+                gga['header'] = b'$GPXXX'
+            ldr._store_nav('gga', gga.tobytes())
+            if iens == 0:
+                ldr._store_nav('vmdas', vmdas.tobytes())
+    ldr._parse_nav(2)
+    dat = ldr.outd
+    # The invalid record (ensemble 1, ping 1) is not averaged.
+    yield (assert_close, dat['orient']['glatitude'], [-45.5, -46],
+           "_parse_nav gives the wrong GPGGA latitude.")
+    yield (assert_close, dat['orient']['glongitude'], [-120, -121],
+           "_parse_nav gives the wrong GPGGA longitude.")
+    yield (data_equiv, dat['gtime'].tolist(), ['123456.00'] * 2,
+           "_parse_nav gives the wrong GPGGA time.")
+    t0 = date2num(datetime(2015, 3, 4))
+    for nm, val in [('stime', t0 + 1. / 86400),
+                    ('etime', t0 + 2. / 86400),
+                    ('ntime', t0 + 3. / 86400),
+                    ('slatitude', 45),
+                    ('elongitude', -90),
+                    ('flags', 3), ]:
+        yield (assert_close, rdi.get(dat, nm), [val, np.NaN],
+               "_parse_nav gives the wrong VMDAS '{}'.".format(nm))
+
+
+def sniff_test():
+
+    msg = "sniff_reader('{}') did not identify the correct reader."
+    for fname, reader in [('RDI_test01.000', read_rdi),
+                          ('winriver02.PD0', read_rdi),
+                          ('BenchFile01.ad2cp', read_signature),
+                          ('AWAC_test01.wpr', read_nortek), ]:
+        yield (data_equiv, sniff_reader(exdt('example_data/' + fname)),
+               reader, msg.format(fname))
+
+
+def read_fallback_test():
+    from dolfyn.io import api
+    from dolfyn.io.base import WrongFileType
+
+    def wrong_reader(fname, userdata=True, nens=None):
+        raise WrongFileType("Not this format.")
+
+    def right_reader(fname, userdata=True, nens=None):
+        return 'right_reader'
+
+    registry = list(api._format_registry)
+    try:
+        api.register_format(b'\x00\x01', right_reader)
+        api.register_format(b'\xff\xfe', wrong_reader)
+        with tmp_dir() as tmpdir:
+            fname = os.path.join(tmpdir, 'misleading.bin')
+            with open(fname, 'wb') as fl:
+                fl.write(b'\xff\xfe' + b'\x00' * 16)
+            yield (data_equiv, api.sniff_reader(fname), wrong_reader,
+                   "sniff_reader did not identify the registered reader.")
+            # The sniffed reader fails, so `read` tries the others.
+            yield (data_equiv, read(fname), 'right_reader',
+                   "read does not fall back to the other readers.")
+    finally:
+        api._format_registry[:] = registry
+
+
+def read_cache_test():
+    fname = exdt('example_data/RDI_test01.000')
+    with tmp_dir() as tmpdir:
+        cache = ReadCache(tmpdir)
+        for itr in range(2):
+            # The first read stores the data, the second loads it.
+            yield (data_equiv, read(fname, cache=cache), dat_rdi,
+                   "read with a cache gives the wrong data ({}).".format(itr))
+        cache.clear()
+        yield (data_equiv, cache.get(cache.key(fname, userdata=True,
+                                               nens=None)), None,
+               "ReadCache.clear did not delete the data.")
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            # Functions can not be stored, so this write fails.
+            cache.put('bad_entry', {'func': lambda x: x})
+        yield (data_equiv, os.listdir(tmpdir), [],
+               "A failed ReadCache.put left files behind.")
+
+
+def batch_test():
+    from dolfyn import batch
+    from dolfyn.adv.base import ADVraw
+    fname = exdt('example_data/RDI_test01.000')
+    with tmp_dir() as tmpdir:
+        res = batch.convert(fname, outdir=tmpdir, workers=1, verbose=False)
+        yield (data_equiv, res[0]['status'], 'done',
+               "batch.convert failed: {}".format(res[0]['error']))
+        yield (data_equiv, load(os.path.join(tmpdir, 'RDI_test01.h5')),
+               dat_rdi, "batch.convert writes the wrong data.")
+        res = batch.convert(fname, outdir=tmpdir, workers=1, verbose=False)
+        yield (data_equiv, res[0]['status'], 'skipped',
+               "batch.convert does not skip up-to-date files.")
+        td = ADVraw()
+        td['props'] = dict(inst_type='ADV', coord_sys='beam',
+                           func=lambda x: x)
+        yield (check_except, lambda d: batch.process(d, rotate='inst'), td,
+               ValueError, "batch.process ignores beam-coordinate ADV data.")
+        # Functions can not be written, so this fails.
+        yield (check_except, lambda d: batch._write(
+            d, [os.path.join(tmpdir, 'bad.h5')], ['h5']), td,
+            Exception, "batch._write does not raise.")
+        yield (data_equiv, sorted(os.listdir(tmpdir)), ['RDI_test01.h5'],
+               "A failed write left a temporary file behind.")
+
+
 def rotate_beam2inst_test(make_data=False):
 
     td = dat_rdi.copy()
@@ -1,9 +1,13 @@
 import dolfyn.adv.api as avm
+from dolfyn.io.api import load_cache
 import numpy as np
+from dolfyn.data.time import num2date, date2num
+from datetime import datetime
+import os
 try:
-    from .base import ResourceFilename
+    from .base import ResourceFilename, tmp_dir
 except ImportError:
-    from base import ResourceFilename
+    from base import ResourceFilename, tmp_dir
 import pyDictH5.base as pdh5_base
 
 load = avm.load
@@ -151,6 +155,48 @@ def turbulence_test(make_data=False):
     assert cd == td, "TurbBinner gives unexpected results!"
 
 
+def spec_test():
+    bnr = avm.TurbBinner(20, dat['props']['fs'], n_fft=8)
+    spec = bnr.do_spec(dat, cross=True)
+    yield (assert_close, spec.vel, bnr.calc_vel_psd(dat.vel),
+           "do_spec(cross=True) gives unexpected spectra.")
+    yield (assert_close, spec.vel_cross, bnr.calc_vel_cpsd(dat.vel),
+           "do_spec(cross=True) gives unexpected cross-spectra.")
+
+
+def xcov_test():
+    bnr = avm.TurbBinner(100, 1.)
+    u, v = np.random.RandomState(0).randn(2, 1000)
+    out = bnr.calc_xcov(u, v, npt=10)
+    # Compare to np.correlate (in the 5th bin):
+    dt1 = u[496:605] - u[501:600].mean()
+    dt2 = v[500:600] - v[500:600].mean()
+    yield (assert_close, out[5], np.correlate(dt1, dt2, 'valid'),
+           "calc_xcov gives unexpected results.")
+
+
+def reshape_test():
+    bnr = avm.TurbBinner(10, 1.)
+    arr = np.arange(35.)
+    out = bnr.reshape(arr)
+    yield (assert_close, out, arr[:30].reshape(3, 10),
+           "TimeBinner.reshape gives unexpected results.")
+    yield (data_equiv, np.shares_memory(out, arr), True,
+           "TimeBinner.reshape should not copy the data.")
+    yield (data_equiv, out.flags.writeable, False,
+           "TimeBinner.reshape should return a read-only array.")
+    # The padding comes from the neighboring bins (or zeros):
+    out = bnr.reshape(arr, n_pad=4)
+    yield (assert_close, out[0], np.hstack(([0, 0], arr[:12])),
+           "TimeBinner.reshape gives unexpected (padded) results.")
+    yield (assert_close, out[-1], np.hstack((arr[18:30], [0, 0])),
+           "TimeBinner.reshape gives unexpected (padded) results.")
+    # Overlapping bins:
+    out = avm.TurbBinner(10, 1., n_step=5).reshape(arr)
+    yield (assert_close, out[:, 0], np.arange(0, 26, 5),
+           "TimeBinner.reshape gives unexpected results (n_step).")
+
+
 def clean_test(make_data=False):
     td = dat.copy()
     avm.clean.GN2002(td.u, 20)
@@ -183,6 +229,166 @@ def subset_test(make_data=False):
         yield (check_except, td._subset, index, IndexError,
                "Attempts to subset to an empty data-object should raise an error.")
 
+    t = td.mpltime
+    yield (data_equiv, td.sel_time(t[2], t[7]), td.subset[2:7],
+           "`sel_time` gives unexpected results.")
+    yield (data_equiv, td.sel_time(num2date(t[2])), td.subset[2:],
+           "`sel_time` with a datetime gives unexpected results.")
+
+    # Slices are views, and share the config.
+    yield (data_equiv, np.shares_memory(td[2:7].vel, td.vel), True,
+           "Slice subsets should be views of the data.")
+    yield (data_equiv, td[2:7].config is td.config, True,
+           "Subsets should share the config.")
+    yield (data_equiv, np.shares_memory(td[2:7].copy().vel, td.vel), False,
+           "`.copy()` of a subset should not share memory.")
+    for obj, nm in [(td, 'data'), (td.config, 'config')]:
+        for indx in [0, None, [1, 2]]:
+            yield (check_except, obj.__getitem__, indx, KeyError,
+                   "Indexing {} objects with {!r} should raise a KeyError."
+                   .format(nm, indx))
+
+
+def read_ascii_test():
+    from dolfyn.adv._readascii import read_sontek_HorizonTab, read_dat
+    with tmp_dir() as tmpdir:
+        fname = os.path.join(tmpdir, 'horizon.txt')
+        with open(fname, 'w') as fl:
+            for ln in ['1\t3/4/2015 1:02:03 PM\t0.1\t0.2\t0.3',
+                       '2\t3/4/2015\t0.4\t0.5\t0.6',
+                       '3\tbad\t0.7\t0.8\t0.9']:
+                fl.write(ln + '\t10\t11\t12\t90\t91\t92\t20\t21\t22\n')
+        td = read_sontek_HorizonTab(fname)
+        yield (assert_close, td.mpltime[:2],
+               [date2num(datetime(2015, 3, 4, 13, 2, 3)),
+                date2num(datetime(2015, 3, 4))],
+               "read_sontek_HorizonTab reads the wrong times.")
+        yield (data_equiv, np.isnan(td.mpltime[2]), True,
+               "Bad time stamps should be NaN.")
+        yield (assert_close, td.vel,
+               [[0.1, 0.4, 0.7], [0.2, 0.5, 0.8], [0.3, 0.6, 0.9]],
+               "read_sontek_HorizonTab reads the wrong velocity.")
+        yield (assert_close, td['corr2'], [91, 91, 91],
+               "read_sontek_HorizonTab reads the wrong correlation.")
+
+        fname = os.path.join(tmpdir, 'iso.dat')
+        with open(fname, 'w') as fl:
+            fl.write('2015-03-04T13:02:03.5 7 0.1 0.2 0.3\n'
+                     '2015-03-04T13:02:04 8 0.4 0.5 0.6\n')
+        td = read_dat(fname, ['_time:%Y-%m-%dT%H:%M:%S.%f;%Y-%m-%dT%H:%M:%S',
+                              'ensemble', 'u', 'v', 'w'])
+        yield (assert_close, td.mpltime,
+               [date2num(datetime(2015, 3, 4, 13, 2, 3, 500000)),
+                date2num(datetime(2015, 3, 4, 13, 2, 4))],
+               "read_dat reads the wrong ISO 8601 times.")
+        yield (assert_close, td['ensemble'], [7, 8],
+               "read_dat reads the wrong data.")
+
+
+def read_sen_test():
+    from dolfyn.adv._readascii import read_sen
+    from dolfyn.adv.base import ADVraw
+    # 4 rows at 1 Hz, for 12 samples at 3 Hz. The third row is
+    # invalid, so it is dropped.
+    rows = [[0, 10.0, -1.0, 2.0, 12.50],
+            [1, 40.0, -2.0, 1.0, 12.75],
+            [2, 50.0, -3.0, 0.0, 'nan'],
+            [3, 70.0, -4.0, 3.0, 13.25]]
+    with tmp_dir() as tmpdir:
+        fname = os.path.join(tmpdir, 'vector.sen')
+        with open(fname, 'w') as fl:
+            for row in rows:
+                fl.write('3 4 2015 13 2 {} 0 0 0.0 12.1 {} {} {} {}\n'
+                         .format(*row))
+        td = ADVraw()
+        td['props'] = dict(fs=3)
+        td['vel'] = np.zeros((3, 12))
+        read_sen(fname, td)
+    k = np.array([0, 3, 9])
+    vals = np.array([row[1:] for row in rows], dtype=np.float64)[[0, 1, 3]]
+    t = date2num(datetime(2015, 3, 4, 13, 2)) + np.array([0, 1, 3]) / 86400.
+    for out, val, nm in [(td.mpltime, t, 'time'),
+                         (td['orient']['heading'], vals[:, 0], 'heading'),
+                         (td['orient']['pitch'], vals[:, 1], 'pitch'),
+                         (td['orient']['roll'], vals[:, 2], 'roll'),
+                         (td['env']['temp'], vals[:, 3], 'temperature')]:
+        yield (assert_close, out[:10], np.interp(np.arange(10), k, val),
+               "read_sen interpolates the {} incorrectly.".format(nm))
+        yield (data_equiv, np.isnan(out[10:]).all(), True,
+               "read_sen should give NaN after the last sensor sample.")
+
+
+def hdf5_chunked_test():
+    import h5py
+    with tmp_dir() as tmpdir:
+        fname = os.path.join(tmpdir, 'vector_data01_chunked.h5')
+        for kwargs in [dict(chunks=16),
+                       dict(chunks=16, compression='lzf', shuffle=True), ]:
+            dat.to_hdf5(fname, **kwargs)
+            yield (data_equiv, load(fname), dat,
+                   "to_hdf5 with {} does not round-trip.".format(kwargs))
+        t = dat.mpltime
+        part = load(fname, time_range=(t[10], t[50]))
+        yield (assert_close, part.mpltime, t[10:50],
+               "load with `time_range` gives the wrong times.")
+        yield (assert_close, part.vel, dat.vel[:, 10:50],
+               "load with `time_range` gives the wrong data.")
+        part = load(fname, index=slice(10, 50, 2))
+        yield (assert_close, part.vel, dat.vel[:, 10:50:2],
+               "load with `index` gives the wrong data.")
+        part = load(fname, data_groups=['', 'orient'], index=slice(10, 50))
+        yield (data_equiv, type(part), type(dat),
+               "load with a list of groups gives the wrong class.")
+        yield (assert_close, part.vel, dat.vel[:, 10:50],
+               "load with a list of groups gives the wrong data.")
+        yield (assert_close, part['orient']['heading'],
+               dat['orient']['heading'][10:50],
+               "load with a list of groups gives the wrong 'orient' data.")
+        yield (data_equiv, load(fname, lazy=True), dat,
+               "lazy load does not round-trip.")
+        part = load(fname, data_groups=['', 'orient'], lazy=True)
+        yield (assert_close, part.vel, dat.vel,
+               "lazy load with a list of groups gives the wrong data.")
+        yield (assert_close, part['orient']['heading'],
+               dat['orient']['heading'],
+               "lazy load with a list of groups gives the wrong 'orient' "
+               "data.")
+        del part
+        fname = os.path.join(tmpdir, 'vector_data01_default.h5')
+        dat.to_hdf5(fname, chunks=16)
+        with h5py.File(fname, 'r') as fl:
+            yield (data_equiv, bool(fl['vel'].shuffle), True,
+                   "to_hdf5 should use the shuffle filter by default.")
+
+
+def cache_test():
+    with tmp_dir() as tmpdir:
+        fname = os.path.join(tmpdir, 'vector_data01.cache')
+        dat.save_cache(fname)
+        yield (data_equiv, load_cache(fname), dat,
+               "save_cache does not round-trip.")
+        yield (data_equiv, load_cache(fname, mmap_mode=None), dat,
+               "save_cache does not round-trip (mmap_mode=None).")
+        h5name = os.path.join(tmpdir, 'vector_data01.h5')
+        dat.to_hdf5(h5name)
+        fname = os.path.join(tmpdir, 'vector_data01_lazy.cache')
+        load(h5name, lazy=True).save_cache(fname)
+        yield (data_equiv, load_cache(fname), dat,
+               "save_cache of lazily loaded data does not round-trip.")
+
+
+def save_mat_test():
+    import h5py
+    with tmp_dir() as tmpdir:
+        fname = os.path.join(tmpdir, 'vector_data01.mat')
+        dat.save_mat(fname, chunks=100)
+        with h5py.File(fname, 'r') as fl:
+            # MATLAB arrays are column-major (i.e., transposed).
+            yield (assert_close, fl['vel'][()].T, dat.vel,
+                   "save_mat writes the wrong velocity.")
+            yield (assert_close, fl['datenum'][()].T[0], dat.mpltime + 366,
+                   "save_mat writes the wrong datenum.")
+
 
 if __name__ == '__main__':
 
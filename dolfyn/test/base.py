@@ -1,5 +1,8 @@
 import pkg_resources
 import atexit
+import contextlib
+import shutil
+import tempfile
 import pyDictH5.base as pb
 
 pb.debug_level = 10
@@ -14,3 +17,15 @@ class ResourceFilename(object):
 
     def __call__(self, name):
         return pkg_resources.resource_filename(self.pkg, name)
+
+
+@contextlib.contextmanager
+def tmp_dir():
+    """
+    A temporary directory that is deleted when the context exits.
+    """
+    tmpdir = tempfile.mkdtemp()
+    try:
+        yield tmpdir
+    finally:
+        shutil.rmtree(tmpdir)
@@ -0,0 +1,49 @@
+from dolfyn.buoy.read import readtxt
+from dolfyn.data.time import date2num
+from datetime import datetime
+import numpy as np
+import os
+try:
+    from .base import tmp_dir
+except ImportError:
+    from base import tmp_dir
+
+# A (shortened) NDBC 'standard meteorological data' file.
+ndbc_txt = """\
+#YY MM DD hh mm WDIR WSPD GST WVHT DPD APD MWD PRES ATMP WTMP DEWP VIS TIDE
+#yr mo dy hr mn degT m/s m/s m sec sec degT hPa degC degC degC nmi ft
+2011 01 01 00 50 210 5.1 6.2 1.20 99.00 99.00 999 1019.1 6.3 7.9 999.0 99.0 99
+2011 01 01 01 50 220 4.5 5.5 99.00 8.00 99.00 999 1018.9 6.1 7.9 3.2 99.0 99.00
+"""
+
+
+def data_equiv(dat1, dat2, message=''):
+    assert dat1 == dat2, message
+
+
+def assert_close(dat1, dat2, message='', *args):
+    assert np.allclose(dat1, dat2, *args), message
+
+
+def readtxt_test():
+    with tmp_dir() as tmpdir:
+        fname = os.path.join(tmpdir, 'ndbc.txt')
+        with open(fname, 'w') as fl:
+            fl.write(ndbc_txt)
+        dat = readtxt(fname)
+    yield (assert_close, dat.mpltime,
+           [date2num(datetime(2011, 1, 1, 0, 50)),
+            date2num(datetime(2011, 1, 1, 1, 50))],
+           "readtxt reads the wrong times.")
+    yield (assert_close, dat['wspd'], [5.1, 4.5],
+           "readtxt reads the wrong wind speed.")
+    for nm, val in [('wvht', [1.2, np.NaN]),
+                    ('dpd', [np.NaN, 8]),
+                    ('mwd', [np.NaN, np.NaN]),
+                    ('dewp', [np.NaN, 3.2]), ]:
+        yield (data_equiv, np.isnan(dat[nm]).tolist(),
+               np.isnan(val).tolist(),
+               "readtxt does not mask 99/999 values in '{}'.".format(nm))
+        yield (assert_close, dat[nm][~np.isnan(val)],
+               np.array(val)[~np.isnan(val)],
+               "readtxt reads the wrong '{}'.".format(nm))
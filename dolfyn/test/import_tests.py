@@ -0,0 +1,70 @@
+import sys
+import subprocess
+from unittest import SkipTest
+
+# Modules that should not be imported by ``import dolfyn`` (they are
+# only needed once a reader, loader, or data class is used).
+heavy_modules = ['h5py', 'pyDictH5', 'scipy', 'pkg_resources', ]
+# Modules that should not be imported by the adv/adp API modules.
+scipy_modules = ['scipy.signal', 'scipy.integrate', 'scipy.special',
+                 'scipy.io', ]
+
+
+def import_time(stmt):
+    """Run `stmt` in a new python process, and return the time it took
+    (in seconds) and the set of modules it imported.
+    """
+    code = ("import sys, time\n"
+            "t0 = time.time()\n"
+            "{}\n"
+            "print(time.time() - t0)\n"
+            "print(' '.join(sys.modules))".format(stmt))
+    out = subprocess.check_output([sys.executable, '-c', code])
+    out = out.decode().splitlines()
+    return float(out[-2]), set(out[-1].split())
+
+
+def check_not_imported(name, modules, stmt):
+    assert name not in modules, "'{}' imports {}.".format(stmt, name)
+
+
+def lazy_import_test():
+    if sys.version_info < (3, 7):
+        raise SkipTest("Lazy imports require python 3.7 or later.")
+    stmt = 'import dolfyn'
+    t, modules = import_time(stmt)
+    for name in heavy_modules:
+        yield check_not_imported, name, modules, stmt
+
+
+def api_import_test():
+    for stmt in ['import dolfyn.adv.api', 'import dolfyn.adp.api']:
+        t, modules = import_time(stmt)
+        for name in scipy_modules:
+            yield check_not_imported, name, modules, stmt
+
+
+def check_in(name, names, message):
+    assert name in names, message
+
+
+def public_names_test():
+    import dolfyn
+    for name in ['read', 'load', 'load_cache', 'read_example', 'VelBinner']:
+        yield (check_in, name, dolfyn.__all__,
+               "'{}' is not in dolfyn.__all__.".format(name))
+        yield (check_in, name, dir(dolfyn),
+               "'{}' is not in dir(dolfyn).".format(name))
+    for name in ['adv', 'adp', 'io']:
+        yield (check_in, name, dir(dolfyn),
+               "'{}' is not in dir(dolfyn).".format(name))
+
+
+if __name__ == '__main__':
+
+    for stmt in ['import dolfyn',
+                 'import dolfyn.adv.api',
+                 'import dolfyn.adp.api',
+                 'import dolfyn; dolfyn.read', ]:
+        t, modules = import_time(stmt)
+        print('{:30s}: {:6.3f} s ({} modules)'.format(stmt, t, len(modules)))
@@ -0,0 +1,89 @@
+from dolfyn.data import time
+from datetime import datetime
+import numpy as np
+
+
+def data_equiv(dat1, dat2, message=''):
+    assert dat1 == dat2, message
+
+
+def assert_close(dat1, dat2, message='', *args):
+    assert np.allclose(dat1, dat2, *args), message
+
+
+def check_except(fn, args, errors=Exception, message=''):
+    try:
+        fn(args)
+    except errors:
+        pass
+    else:
+        raise Exception(message)
+
+
+def isotime_test():
+    t = time.date2num(datetime(2015, 3, 4, 13, 2, 3))
+    yield (data_equiv, time.isotime2mpltime('2015-03-04T13:02:03'), t,
+           "isotime2mpltime gives the wrong time for a string.")
+    yield (assert_close,
+           time.isotime2mpltime(['2015-03-04T13:02:03',
+                                 '2015-03-04T13:02:03.25']),
+           [t, time.date2num(datetime(2015, 3, 4, 13, 2, 3, 250000))],
+           "isotime2mpltime gives the wrong times for a list.")
+    yield (data_equiv, time.isotime2mpltime([]).shape, (0, ),
+           "isotime2mpltime should return an empty array for [].")
+    for val in ['', 'NaT', '2015-03-04', '2015-03-04 13:02:03',
+                '2015-03-04T13:02:03Z', '2015-03-04T13:02:03+02:00',
+                '2015-03-04T13:02:03.', '2015-13-04T13:02:03']:
+        yield (check_except, time.isotime2mpltime,
+               ['2015-03-04T13:02:03', val], ValueError,
+               "isotime2mpltime accepts '{}'.".format(val))
+    yield (check_except, time.isotime2mpltime, [1., 2.], ValueError,
+           "isotime2mpltime accepts numbers.")
+
+
+def ymdhms2num_test():
+    fields = np.array([[2015, 3, 4, 13, 2, 3, 250000],
+                       [1999, 12, 31, 23, 59, 59, 999999],
+                       [2016, 2, 29, 0, 0, 0, 0],
+                       [1, 1, 1, 0, 0, 0, 0]])
+    yield (data_equiv,
+           time.ymdhms2num(*fields.T).tolist(),
+           [time.date2num(datetime(*fld)) for fld in fields],
+           "ymdhms2num does not match date2num(datetime(...)).")
+    yield (data_equiv, time.ymdhms2num(2015, 3, 4, 12).tolist(),
+           time.date2num(datetime(2015, 3, 4, 12)),
+           "ymdhms2num gives the wrong value for scalars.")
+    # Invalid fields (Feb 29 of a non-leap year, month 13, hour 24).
+    yield (data_equiv,
+           np.isnan(time.ymdhms2num([2015, 2015, 2015], [2, 13, 3],
+                                    [29, 1, 4], [0, 0, 24])).tolist(),
+           [True, True, True],
+           "ymdhms2num should give NaN for invalid fields.")
+
+
+def datetime64_test():
+    dts = [datetime(2015, 3, 4, 13, 2, 3, 250000),
+           datetime(1999, 12, 31, 23, 59, 59, 999999),
+           datetime(1970, 1, 1, 0, 0, 0, 5),
+           datetime(2016, 2, 29)]
+    mpltime = np.array([time.date2num(dt) for dt in dts])
+    m8 = np.array(dts, dtype='M8[us]')
+    yield (data_equiv, time.M82num(m8).tolist(), mpltime.tolist(),
+           "M82num does not match date2num(datetime(...)).")
+    # mpltime has ~10 us resolution, so compare with (scalar) num2date.
+    ref = [time.num2date(val) for val in mpltime]
+    yield (data_equiv, time.num2M8(mpltime).tolist(), ref,
+           "num2M8 does not match num2date.")
+    yield (data_equiv, np.isnan(time.M82num(np.array(['NaT'], 'M8[us]'))[0]),
+           True, "M82num should give NaN for NaT.")
+    yield (data_equiv, np.isnat(time.num2M8([np.NaN])[0]), True,
+           "num2M8 should give NaT for NaN.")
+    tarr = time.time_array(mpltime)
+    yield (data_equiv, tarr.datetime.tolist(), ref,
+           "time_array.datetime is wrong.")
+    for nm in ['year', 'month', 'day', 'hour', 'minute', 'second']:
+        yield (data_equiv, getattr(tarr, nm).tolist(),
+               [getattr(dt, nm) for dt in ref],
+               "time_array.{} is wrong.".format(nm))
+    yield (data_equiv, tarr.datetime64 is tarr.datetime64, True,
+           "time_array.datetime64 should be cached.")
@@ -1,5 +1,4 @@
 import numpy as np
-from scipy.signal import medfilt2d, convolve2d
 
 
 def nans(*args, **kwargs):
@@ -311,6 +310,7 @@ def medfiltnan(a, kernel, thresh=0):
 
     Currently only work for vectors.
     """
+    from scipy.signal import medfilt2d, convolve2d
     flag_1D = False
     if a.ndim == 1:
         a = a[None, :]
@@ -1,6 +1,7 @@
 import numpy as np
 from .misc import detrend
 fft = np.fft.fft
+rfft = np.fft.rfft
 
 ## class FFTobj(np.ndarray):
 
@@ -93,6 +94,41 @@ def _stepsize(l, nfft, nens=None, step=None):
         return int((l - nfft) / (nens - 1)), nens, nfft
 
 
+def _nseg(l, nfft, step, nens):
+    """
+    The number of segments that are summed for a length `l` signal
+    (the first one, and one every `step` points after that).
+    """
+    if nens - 1:
+        return 1 + len(range(step, l - nfft + 1, step))
+    return 1
+
+
+def _fft_segments(a, nfft, step, nseg, window, fft_inds):
+    """
+    Return the fft of the detrended, windowed segments of `a`.
+
+    The segments are a strided view of `a` (..., nseg, nfft), so that
+    all of them are detrended, windowed and fft'd at once (along the
+    last axis).
+    """
+    a = np.asarray(a)
+    seg = np.lib.stride_tricks.as_strided(
+        a,
+        shape=a.shape[:-1] + (nseg, nfft),
+        strides=a.strides[:-1] + (step * a.strides[-1], a.strides[-1]),
+        writeable=False)
+    return rfft(detrend(seg, axis=-1) * window, axis=-1)[..., fft_inds]
+
+
+def _noise_pair(noise):
+    if noise.__class__ not in [list, tuple, np.ndarray]:
+        return [noise, noise]
+    elif len(noise) == 1:
+        return [noise[0], noise[0]]
+    return noise
+
+
 def cohere(a, b, nfft, window='hann', debias=True, noise=(0, 0)):
     r"""
     Computes the magnitude-squared coherence of `a` and `b`.
@@ -134,20 +170,22 @@ def cohere(a, b, nfft, window='hann', debias=True, noise=(0, 0)):
     Here :math:`S_{ab}`, :math:`S_{aa}` and :math:`S_{bb}` are the cross,
     and auto spectral densities of the signal `a` and `b`.
 
+    If `a` and `b` are the same length, they can be N-dimensional
+    arrays (the coherence is computed along the last axis).
+
     """
-    l = [len(a), len(b)]
-    cross = cpsd_quasisync
+    l = [np.shape(a)[-1], np.shape(b)[-1]]
     if l[0] == l[1]:
-        cross = cpsd
-    elif l[0] > l[1]:
+        # Compute the fft's of `a` and `b` only once.
+        return SpecProducts([a, b], nfft, 1, window=window).cohere(
+            0, 1, debias=debias, noise=noise)
+    cross = cpsd_quasisync
+    if l[0] > l[1]:
         a, b = b, a
         l = l[::-1]
     step1, nens, nfft = _stepsize(l[0], nfft)
     step2, nens, nfft = _stepsize(l[1], nfft, nens=nens)
-    if noise.__class__ not in [list, tuple, np.ndarray]:
-        noise = [noise, noise]
-    elif len(noise) == 1:
-        noise = [noise[0], noise[0]]
+    noise = _noise_pair(noise)
     if nens <= 2:
         raise Exception("Coherence must be computed from a set of ensembles.")
     # fs=1 is ok because it comes out in the normalization.  (noise
@@ -243,7 +281,6 @@ def cpsd_quasisync(a, b, nfft, fs, window='hann'):
     wght = 2. / (window ** 2).sum()
     pwr = fft(detrend(a[0:nfft]) * window)[fft_inds] * \
         np.conj(fft(detrend(b[0:nfft]) * window)[fft_inds])
-    print(pwr.dtype)
     if nens - 1:
         for i1, i2 in zip(range(step[0], l[0] - nfft + 1, step[0]),
                           range(step[1], l[1] - nfft + 1, step[1])):
@@ -318,34 +355,31 @@ def cpsd(a, b, nfft, fs, window='hann', step=None):
 
     The units of the spectra is the product of the units of `a` and
     `b`, divided by the units of fs.
+
+    `a` and `b` can be N-dimensional arrays (of the same shape), in
+    which case the cpsd is computed along the last axis. All of the
+    fft's are computed at once (there is no loop over segments).
     """
     if np.iscomplexobj(a) or np.iscomplexobj(b):
         raise Exception
     auto_psd = False
     if a is b:
         auto_psd = True
-    l = len(a)
+    l = np.shape(a)[-1]
     step, nens, nfft = _stepsize(l, nfft, step=step)
+    nseg = _nseg(l, nfft, step, nens)
     fs = np.float64(fs)
     window = _getwindow(window, nfft)
     fft_inds = slice(1, int(nfft / 2. + 1))
     wght = 2. / (window ** 2).sum()
-    s1 = fft(detrend(a[0:nfft]) * window)[fft_inds]
+    s1 = _fft_segments(a, nfft, step, nseg, window, fft_inds)
     if auto_psd:
-        pwr = np.abs(s1) ** 2
+        pwr = (np.abs(s1) ** 2).sum(-2)
     else:
-        pwr = s1 * np.conj(fft(detrend(b[0:nfft]) * window)[fft_inds])
-    if nens - 1:
-        for i in range(step, l - nfft + 1, step):
-            # print( (i) )
-            s1 = fft(detrend(a[i:(i + nfft)]) * window)[fft_inds]
-            if auto_psd:
-                pwr += np.abs(s1) ** 2
-            else:
-                pwr += s1 * np.conj(fft(detrend(b[i:(i + nfft)]) * window)[fft_inds])
+        pwr = (s1 * np.conj(_fft_segments(b, nfft, step, nseg,
+                                          window, fft_inds))).sum(-2)
+    # Note: this divides by nens (not nseg).
     pwr *= wght / nens / fs
-    # print( 1,step,nens,l,nfft,wght,fs )
-    # error
     return pwr
 
 
@@ -361,7 +395,8 @@ def psd(a, nfft, fs, window='hann', step=None):
 
     Parameters
     ----------
-    a      : 1d-array_like, the signal. Currently only supports vectors.
+    a      : array_like, the signal. The psd is computed along the
+             last axis.
     nfft   : The number of points in the fft.
     fs     : The sample rate (e.g. sample/second).
     window : The window to use (default: 'hann'). Valid entries are:
@@ -432,23 +467,96 @@ def phase_angle(a, b, nfft, window='hann', step=None):
     cpsd
 
     """
+    # `b` is segmented in the same way as `a`.
+    return SpecProducts([a, b[..., :np.shape(a)[-1]]], nfft, 1,
+                        window=window, step=step).phase_angle(0, 1)
 
-    window = _getwindow(window, nfft)
-    fft_inds = slice(1, int(nfft / 2. + 1))
-    s1 = fft(detrend(a[0:nfft]) * window)[fft_inds]
-    s2 = fft(detrend(b[0:nfft]) * window)[fft_inds]
-    s1 /= np.abs(s1)
-    s2 /= np.abs(s2)
-    ang = s2 / s1
-    l = len(a)
-    step, nens, nfft = _stepsize(l, nfft, step=step)
-    if nens - 1:
-        for i in range(step, l - nfft + 1, step):
-            # print( (i) )
-            s1 = fft(detrend(a[i:(i + nfft)]) * window)[fft_inds]
-            s1 /= np.abs(s1)
-            s2 = fft(detrend(a[i:(i + nfft)]) * window)[fft_inds]
-            s2 /= np.abs(s2)
-            ang += s2 / s1
-    ang /= nens
-    return ang
+
+class SpecProducts(object):
+    """
+    Spectral products (auto-spectra, cross-spectra, coherence and
+    phase) of a set of signals.
+
+    The detrended, windowed, segment fft's of each signal are
+    computed once (when this object is created), and all of the
+    spectral products are computed from them.
+
+    Parameters
+    ----------
+    dat : list of |np.ndarray|, or |np.ndarray|
+      The signals (e.g., the three components of velocity). The
+      signals can be N-dimensional (the spectra are computed along
+      the last axis), but they must all have the same length.
+    nfft : int
+      The number of points in the fft.
+    fs : float
+      The sample rate (e.g. sample/second).
+    window : {None, 1, 'hann', |np.ndarray|}
+      The window to use (default: 'hann').
+    step : int
+      The step between segments (see :func:`cpsd`).
+
+    Examples
+    --------
+    Compute the spectra of the velocity, and the coherence of u and
+    w, from one set of fft's::
+
+        >>> spec = SpecProducts(vel, 1024, 16)
+        >>> Suu = spec.psd(0)
+        >>> Suw = spec.cpsd(0, 2)
+        >>> Cuw = spec.cohere(0, 2)
+
+    See also
+    --------
+    :func:`psd`, :func:`cpsd`, :func:`cohere`, :func:`phase_angle`
+    """
+
+    def __init__(self, dat, nfft, fs, window='hann', step=None):
+        l = np.shape(dat[0])[-1]
+        self.step, self.nens, self.nfft = _stepsize(l, nfft, step=step)
+        nseg = _nseg(l, self.nfft, self.step, self.nens)
+        self.fs = np.float64(fs)
+        window = _getwindow(window, self.nfft)
+        fft_inds = slice(1, int(self.nfft / 2. + 1))
+        self._wght = 2. / (window ** 2).sum()
+        self.fft = [_fft_segments(d, self.nfft, self.step, nseg,
+                                  window, fft_inds) for d in dat]
+
+    def psd(self, i):
+        """The power spectral density of signal `i` (see :func:`psd`).
+        """
+        pwr = (np.abs(self.fft[i]) ** 2).sum(-2)
+        pwr *= self._wght / self.nens / self.fs
+        return pwr
+
+    def cpsd(self, i, j):
+        """The cross power spectral density of signals `i` and `j` (see
+        :func:`cpsd`).
+        """
+        pwr = (self.fft[i] * np.conj(self.fft[j])).sum(-2)
+        pwr *= self._wght / self.nens / self.fs
+        return pwr
+
+    def cohere(self, i, j, debias=True, noise=(0, 0)):
+        """The magnitude-squared coherence of signals `i` and `j` (see
+        :func:`cohere`).
+        """
+        noise = _noise_pair(noise)
+        if self.nens <= 2:
+            raise Exception("Coherence must be computed from a set "
+                            "of ensembles.")
+        out = ((np.abs(self.cpsd(i, j)) ** 2) /
+               ((self.psd(i) - noise[0] ** 2 / (np.pi * self.fs)) *
+                (self.psd(j) - noise[1] ** 2 / (np.pi * self.fs))))
+        if debias:
+            # This is from Benignus1969.
+            return out * (1 + 1. / self.nens) - 1. / self.nens
+        return out
+
+    def phase_angle(self, i, j):
+        """The phase difference between signals `i` and `j`, as unit
+        magnitude complex numbers (see :func:`phase_angle`).
+        """
+        s1 = self.fft[i] / np.abs(self.fft[i])
+        s2 = self.fft[j] / np.abs(self.fft[j])
+        return (s2 / s1).sum(-2) / self.nens
@@ -0,0 +1,12 @@
+#!/usr/bin/python
+"""
+Convert directories (or glob patterns) of raw ADV/ADP data files to
+HDF5, Matlab(TM) or dolfyn-cache files, in parallel.
+
+Run ``dolfyn_batch.py --help`` for the options.
+"""
+import sys
+from dolfyn.batch import main
+
+if __name__ == '__main__':
+    sys.exit(main())
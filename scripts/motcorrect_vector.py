@@ -142,7 +142,7 @@ if not (args.mat or args.hdf5):
 # Now loop over the specified file names:
 for fnm in args.filename:
 
-    dat = avm.read_nortek(fnm)
+    dat = avm.read(fnm)
 
     if rmat is not None:
         dat.props['body2head_rotmat'] = rmat
@@ -159,9 +159,6 @@ for fnm in args.filename:
                         "  3) specifying them in a '.orient' file "
                         "(will be deprecated).")
 
-        # Set matlab 'datenum' time.
-        dat.add_data('datenum', dat.mpltime.matlab_datenum, 'main')
-
     # Perform motion correction.
     if hasattr(dat, 'orientmat'):
         print('Performing motion correction...')
@@ -177,13 +174,13 @@ for fnm in args.filename:
     if args.mat:
         outnm = fnm.rstrip('.vec').rstrip('.VEC') + '.mat'
         print('Saving to %s.' % outnm)
-        # Save the data.
-        dat.save_mat(outnm, groups=['main', 'orient'])
+        # Save the data (this also adds the matlab 'datenum' time).
+        dat.save_mat(outnm, groups=['orient'])
 
     if args.hdf5:
         outnm = fnm.rstrip('.vec').rstrip('.VEC') + '.hdf5'
         print('Saving to %s.' % outnm)
         # Save the data.
-        dat.save(outnm,)
+        dat.to_hdf5(outnm)
 
     del dat
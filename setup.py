@@ -43,7 +43,8 @@ config = dict(
     package_data={},
     install_requires=['numpy', 'scipy', 'h5py', 'pyDictH5'],
     provides=['dolfyn', ],
-    scripts=['scripts/motcorrect_vector.py', 'scripts/vec2mat.py'],
+    scripts=['scripts/motcorrect_vector.py', 'scripts/vec2mat.py',
+             'scripts/dolfyn_batch.py'],
     # entry_points = {
     #    'console_scripts':
     #    ['motcorrect_vector = dolfyn.adv.scripts:motcorrect_vector',